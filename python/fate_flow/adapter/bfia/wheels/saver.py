@@ -13,6 +13,14 @@ class BfiaJobSaver(JobSaver):
     def check_job_status(cls, old_status, dest_status):
         return JobStatus.StateTransitionRule.if_pass(src_status=old_status, dest_status=dest_status)
 
+    @classmethod
+    def task_status_sources(cls, dest_status):
+        return TaskStatus.StateTransitionRule.sources(dest_status)
+
+    @classmethod
+    def job_status_sources(cls, dest_status):
+        return JobStatus.StateTransitionRule.sources(dest_status)
+
     @classmethod
     def end_status_contains(cls, status):
         return EndStatus.contains(status)
@@ -20,7 +20,7 @@ import tarfile
 from webargs import fields
 
 from fate_flow.apps.desc import DAG_SCHEMA, USER_NAME, JOB_ID, ROLE, PARTY_ID, STATUS, LIMIT, PAGE, PARTNER, ORDER_BY, \
-    ORDER, DESCRIPTION, TASK_NAME, TASK_ID, TASK_VERSION, NODES
+    ORDER, DESCRIPTION, TASK_NAME, TASK_ID, TASK_VERSION, NODES, CURSOR, WITH_COUNT
 from fate_flow.controller.job import JobController
 from fate_flow.entity.code import ReturnCode
 from fate_flow.entity.spec.dag import DAGSchema
@@ -103,14 +103,17 @@ def request_rerun_job(job_id=None):
 @API.Input.params(status=fields.List(fields.Str(), required=False), desc=STATUS)
 @API.Input.params(order_by=fields.String(required=False), desc=ORDER_BY)
 @API.Input.params(order=fields.String(required=False), desc=ORDER)
+@API.Input.params(cursor=fields.String(required=False), desc=CURSOR)
+@API.Input.params(with_count=fields.Boolean(required=False), desc=WITH_COUNT)
 @API.Input.headers(user_name=fields.String(required=False), desc=USER_NAME)
 def query_job_list(limit=0, page=0, job_id=None, description=None, partner=None, party_id=None, role=None, status=None,
-                   order_by=None, order=None, user_name=None):
-    count, data = JobController.query_job_list(
-        limit, page, job_id, description, partner, party_id, role, status, order_by, order, user_name
+                   order_by=None, order=None, cursor=None, with_count=True, user_name=None):
+    count, data, next_cursor = JobController.query_job_list(
+        limit, page, job_id, description, partner, party_id, role, status, order_by, order, user_name,
+        cursor=cursor, with_count=with_count
     )
     return API.Output.json(code=ReturnCode.Base.SUCCESS, message="success",
-                           data={"count": count, "data": data})
+                           data={"count": count, "data": data, "next_cursor": next_cursor})
 
 
 @manager.route('/task/query', methods=['GET'])
@@ -144,13 +147,16 @@ def query_task(job_id=None, role=None, party_id=None, status=None, task_name=Non
 @API.Input.params(task_name=fields.String(required=False), desc=TASK_NAME)
 @API.Input.params(order_by=fields.String(required=False), desc=ORDER_BY)
 @API.Input.params(order=fields.String(required=False), desc=ORDER)
-def query_task_list(limit=0, page=0, job_id=None, role=None, party_id=None, task_name=None, order_by=None, order=None):
-    count, data = JobController.query_task_list(
-        limit, page, job_id, role, party_id, task_name, order_by, order
+@API.Input.params(cursor=fields.String(required=False), desc=CURSOR)
+@API.Input.params(with_count=fields.Boolean(required=False), desc=WITH_COUNT)
+def query_task_list(limit=0, page=0, job_id=None, role=None, party_id=None, task_name=None, order_by=None, order=None,
+                    cursor=None, with_count=True):
+    count, data, next_cursor = JobController.query_task_list(
+        limit, page, job_id, role, party_id, task_name, order_by, order, cursor=cursor, with_count=with_count
     )
     return API.Output.json(
         code=ReturnCode.Base.SUCCESS, message="success",
-        data={"count": count, "data": data}
+        data={"count": count, "data": data, "next_cursor": next_cursor}
     )
 
 
@@ -13,6 +13,7 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 #
+from flask import Response
 from webargs import fields
 
 from fate_flow.apps.desc import SERVER_NAME, HOST, PORT, PROTOCOL, SERVICE_NAME, URI, METHOD, PARAMS, DATA, HEADERS
@@ -20,6 +21,7 @@ from fate_flow.errors.server_error import NoFoundServer
 from fate_flow.manager.service.service_manager import ServiceRegistry, ServerRegistry
 from fate_flow.runtime.runtime_config import RuntimeConfig
 from fate_flow.utils.api_utils import API
+from fate_flow.utils.metrics import Metrics
 
 
 @manager.route('/fateflow', methods=['GET'])
@@ -28,6 +30,11 @@ def fate_flow_server_info():
     return API.Output.json(data=datas)
 
 
+@manager.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(Metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
 @manager.route('/query/all', methods=['GET'])
 def query_all():
     data = ServerRegistry.get_all()
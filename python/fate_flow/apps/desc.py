@@ -26,6 +26,8 @@ DESCRIPTION = "Description information"
 PARTNER = "Participant information"
 ORDER_BY = "Field name for sorting"
 ORDER = "Sorting order: asc/desc"
+CURSOR = "Cursor of the next page returned by the previous query, takes the place of the page number"
+WITH_COUNT = "Whether to count the total number of matched rows"
 
 # task
 TASK_NAME = "Task name"
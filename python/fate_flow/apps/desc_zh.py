@@ -26,6 +26,8 @@ DESCRIPTION = "描述信息"
 PARTNER = "参与方信息"
 ORDER_BY = "排序的字段名"
 ORDER = "排序方式：asc/desc"
+CURSOR = "上一次查询返回的下一页游标，用于代替页码"
+WITH_COUNT = "是否统计匹配的总条数"
 
 # task
 TASK_NAME = "任务名称"
@@ -23,6 +23,7 @@ from fate_flow.errors.server_error import CreateJobFailed, UpdateJobFailed, Kill
     NoFoundTask, StartTaskFailed, UpdateTaskFailed, KillTaskFailed, TaskResourceException
 from fate_flow.manager.service.resource_manager import ResourceManager
 from fate_flow.manager.operation.job_saver import JobSaver
+from fate_flow.scheduler.event import ScheduleEvent
 from fate_flow.utils.api_utils import API, stat_logger
 from fate_flow.utils.permission_utils import create_job_request_check
 from fate_flow.utils.wraps_utils import task_request_proxy
@@ -69,6 +70,7 @@ def partner_job_status_update(job_id, role, party_id, status):
         "status": status
     }
     if JobController.update_job_status(job_info=job_info):
+        ScheduleEvent.put(job_id)
         return API.Output.json(code=ReturnCode.Base.SUCCESS, message='success')
     else:
         return API.Output.fate_flow_exception(UpdateJobFailed(
@@ -125,6 +127,41 @@ def return_resource(job_id, role, party_id):
         ))
 
 
+@manager.route('/job/batch/resource/apply', methods=['POST'])
+@API.Input.json(jobs=fields.List(fields.Dict(), required=True))
+def batch_apply_resource(jobs):
+    return API.Output.json(data=[
+        batch_job_resource(job, ResourceManager.apply_for_job_resource, operation_type="apply") for job in jobs
+    ])
+
+
+@manager.route('/job/batch/resource/return', methods=['POST'])
+@API.Input.json(jobs=fields.List(fields.Dict(), required=True))
+def batch_return_resource(jobs):
+    return API.Output.json(data=[
+        batch_job_resource(job, ResourceManager.return_job_resource, operation_type="return") for job in jobs
+    ])
+
+
+def batch_job_resource(job, operate, operation_type):
+    job_id, role, party_id = job.get("job_id"), job.get("role"), job.get("party_id")
+    response = {"job_id": job_id, "role": role, "party_id": party_id,
+                "code": ReturnCode.Base.SUCCESS, "message": "success"}
+    try:
+        status = operate(job_id=job_id, role=role, party_id=party_id)
+    except Exception as e:
+        stat_logger.exception(e)
+        if len(e.args) > 1 and isinstance(e.args[0], int):
+            response.update({"code": e.args[0], "message": e.args[1]})
+        else:
+            response.update({"code": ReturnCode.Server.EXCEPTION, "message": repr(e)})
+        return response
+    if not status:
+        e = JobResourceException(job_id=job_id, role=role, party_id=party_id, operation_type=operation_type)
+        response.update({"code": e.code, "message": e.message})
+    return response
+
+
 @manager.route('/job/stop', methods=['POST'])
 @API.Input.json(job_id=fields.String(required=True))
 @API.Input.json(role=fields.String(required=True))
@@ -228,6 +265,7 @@ def task_status_update(job_id, role, party_id, task_id, task_version, status):
         "status": status
     })
     if TaskController.update_task_status(task_info=task_info):
+        ScheduleEvent.put(job_id)
         return API.Output.json()
     else:
         return API.Output.fate_flow_exception(UpdateTaskFailed(
@@ -236,6 +274,48 @@ def task_status_update(job_id, role, party_id, task_id, task_version, status):
         )
 
 
+@manager.route('/task/batch/collect', methods=['POST'])
+@API.Input.json(job_id=fields.String(required=True))
+@API.Input.json(tasks=fields.List(fields.Dict(), required=True))
+def batch_collect_task(job_id, tasks):
+    tasks_info = TaskController.collect_tasks(job_id=job_id, tasks=tasks)
+    data = []
+    for task in tasks:
+        response = {k: task.get(k) for k in ["task_id", "task_version", "role", "party_id"]}
+        task_info = tasks_info.get((task.get("task_id"), task.get("task_version"), task.get("role"),
+                                    task.get("party_id")))
+        if task_info:
+            response.update({"code": ReturnCode.Base.SUCCESS, "message": "success", "data": task_info})
+        else:
+            e = NoFoundTask(job_id=job_id, **response)
+            response.update({"code": e.code, "message": e.message})
+        data.append(response)
+    return API.Output.json(data=data)
+
+
+@manager.route('/task/batch/status/update', methods=['POST'])
+@API.Input.json(job_id=fields.String(required=True))
+@API.Input.json(tasks=fields.List(fields.Dict(), required=True))
+def batch_task_status_update(job_id, tasks):
+    data = []
+    for task in tasks:
+        response = {k: task.get(k) for k in ["task_id", "task_version", "role", "party_id"]}
+        task_info = dict(response, job_id=job_id, status=task.get("status"))
+        try:
+            update_status = TaskController.update_task_status(task_info=task_info)
+        except Exception as e:
+            stat_logger.exception(e)
+            update_status = False
+        if update_status:
+            response.update({"code": ReturnCode.Base.SUCCESS, "message": "success"})
+        else:
+            e = UpdateTaskFailed(job_id=job_id, status=task.get("status"), **response)
+            response.update({"code": e.code, "message": e.message})
+        data.append(response)
+    ScheduleEvent.put(job_id)
+    return API.Output.json(data=data)
+
+
 @manager.route('/task/stop', methods=['POST'])
 @API.Input.json(job_id=fields.String(required=True))
 @API.Input.json(role=fields.String(required=True))
@@ -17,6 +17,7 @@ from webargs import fields
 from fate_flow.entity.spec.dag import DAGSchema
 from fate_flow.errors.server_error import UpdateTaskFailed
 from fate_flow.manager.operation.job_saver import ScheduleJobSaver
+from fate_flow.scheduler.event import ScheduleEvent
 from fate_flow.scheduler.scheduler import DAGScheduler
 from fate_flow.utils.api_utils import API
 
@@ -49,6 +50,7 @@ def report_task(job_id, role, party_id, task_id, task_version, status=None):
         "status": status
     })
     if status:
+        ScheduleEvent.put(job_id)
         return API.Output.json()
     return API.Output.fate_flow_exception(UpdateTaskFailed(
         job_id=job_id, role=role, party_id=party_id,
@@ -61,6 +63,7 @@ def report_task(job_id, role, party_id, task_id, task_version, status=None):
 @API.Input.json(stop_status=fields.String(required=False))
 def stop_job(job_id, stop_status=None):
     retcode, retmsg = DAGScheduler.stop_job(job_id, stop_status)
+    ScheduleEvent.put(job_id)
     return API.Output.json(code=retcode, message=retmsg)
 
 
@@ -12,11 +12,15 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
+import itertools
 import json
 import logging
+import mmap
+import multiprocessing
 import os
 import secrets
 import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import Union
 
 from fate_flow.components import cpn
@@ -28,6 +32,13 @@ from fate_flow.runtime.system_settings import STANDALONE_DATA_HOME, ENGINES
 from fate_flow.utils.file_utils import get_fate_flow_directory
 from fate_flow.utils.io_utils import URI
 
+# engines whose tables can be written by several processes at the same time
+PARALLEL_UPLOAD_ENGINES = {StorageEngine.STANDALONE, StorageEngine.EGGROLL}
+# a byte range is never smaller than this, small files are uploaded in the current process
+MIN_RANGE_SIZE = 64 * 1024 * 1024
+# kv pairs buffered per partition before they are written
+PARTITION_BUFFER_SIZE = 10000
+
 
 @cpn.component()
 def upload(
@@ -111,7 +122,10 @@ class UploadParam(Param):
             extend_sid=False,
             is_temp_file=False,
             address: dict = {},
-            meta: dict = {}
+            meta: dict = {},
+            processes: int = None,
+            key_serdes_type: int = 0,
+            value_serdes_type: int = 0
     ):
         self.name = name
         self.namespace = namespace
@@ -123,6 +137,10 @@ class UploadParam(Param):
         self.meta = MetaParam(**meta)
         self.storage_address = address
         self.is_temp_file = is_temp_file
+        self.processes = processes
+        # the keys and values of an upload are str, 2 (utf-8 string serdes) skips pickle, for the readers that know it
+        self.key_serdes_type = key_serdes_type
+        self.value_serdes_type = value_serdes_type
 
 
 class Upload:
@@ -212,9 +230,7 @@ class Upload:
 
     def save_data_table(self, job_id):
         input_file = self.parameters.file
-        input_feature_count = self.get_count(input_file)
-        self.upload_file(input_file, job_id, input_feature_count)
-        table_count = self.table.count()
+        table_count = self.upload_file(input_file, job_id)
         metas_info = {
             "count": table_count,
             "partitions": self.parameters.partitions,
@@ -230,6 +246,8 @@ class Upload:
         read_status = False
         if self.parameters.head is True:
             data_head = fp.readline()
+            if isinstance(data_head, bytes):
+                data_head = data_head.decode("utf-8")
             id_index = self.update_table_meta(data_head)
             read_status = True
         else:
@@ -237,22 +255,54 @@ class Upload:
         return id_index, read_status
 
     def upload_file(self, input_file, job_id, input_feature_count=None, table=None):
+        """
+        Split the data part of the file into line aligned byte ranges, parse and write them in a process pool
+        and take the count of stored keys from the writers, so the file is read only once.
+        """
         if not table:
             table = self.table
-        part_of_data = []
-        with open(input_file, "r") as fp:
+        with open(input_file, "rb") as fp:
             id_index, read_status = self.update_schema(fp)
-            if read_status:
-                input_feature_count -= 1
-            self.table.put_all(self.kv_generator(input_feature_count, fp, job_id, part_of_data, id_index=id_index))
-            table.meta.update_metas(part_of_data=part_of_data)
+            data_offset = fp.tell()
+        ranges = split_file_ranges(input_file, data_offset, self.get_processes(table))
+        fate_uuid = secrets.token_bytes(16).hex()
+        upload_ranges = [
+            UploadRange(
+                name=table.name, namespace=table.namespace, file=input_file, start=start, end=end,
+                line_base=start - data_offset, delimiter=self.parameters.meta.delimiter, id_index=id_index,
+                extend_sid=self.parameters.extend_sid, fate_uuid=fate_uuid
+            ) for start, end in ranges
+        ]
+        logging.info(f"upload {input_file} by {len(upload_ranges)} ranges: {ranges}")
+        if len(upload_ranges) <= 1:
+            results = [upload_range(upload_ranges[0], table=table)] if upload_ranges else [(0, [])]
+        else:
+            results = [None] * len(upload_ranges)
+            with ProcessPoolExecutor(max_workers=len(upload_ranges),
+                                     mp_context=multiprocessing.get_context("spawn")) as pool:
+                futures = {pool.submit(upload_range, _range): i for i, _range in enumerate(upload_ranges)}
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+                    save_progress = len([result for result in results if result]) / len(results) * 100 // 1
+                    logging.info(f"job {job_id} upload progress: {save_progress}")
+        count = 0
+        for result in results:
+            count = add_count(count, result[0])
+        if count is None:
+            count = table.count(verify=True)
+        part_of_data = results[0][1]
+        table.meta.update_metas(part_of_data=part_of_data)
+        return count
+
+    def get_processes(self, table):
+        if table.engine not in PARALLEL_UPLOAD_ENGINES:
+            return 1
+        if self.parameters.processes:
+            return max(int(self.parameters.processes), 1)
+        return max(min(os.cpu_count() or 1, int(self.parameters.partitions)), 1)
 
     def get_line(self):
-        if not self.parameters.extend_sid:
-            line = self.get_data_line
-        else:
-            line = self.get_sid_data_line
-        return line
+        return get_line_func(self.parameters.extend_sid)
 
     @staticmethod
     def get_data_line(values, delimiter, id_index, **kwargs):
@@ -271,45 +321,6 @@ class Upload:
     def get_sid_data_line(values, delimiter, fate_uuid, line_index, **kwargs):
         return fate_uuid + str(line_index), delimiter.join(list(map(str, values[:])))
 
-    def kv_generator(self, input_feature_count, fp, job_id, part_of_data, id_index):
-        fate_uuid = secrets.token_bytes(16).hex()
-        get_line = self.get_line()
-        line_index = 0
-        logging.info(input_feature_count)
-        while True:
-            lines = fp.readlines(104857600)
-            if lines:
-                for line in lines:
-                    values = line.rstrip().split(self.parameters.meta.delimiter)
-                    k, v = get_line(
-                        values=values,
-                        line_index=line_index,
-                        delimiter=self.parameters.meta.delimiter,
-                        fate_uuid=fate_uuid,
-                        id_index=id_index
-                    )
-                    yield k, v
-                    line_index += 1
-                    if line_index <= 100:
-                        part_of_data.append((k, v))
-                save_progress = line_index / input_feature_count * 100 // 1
-                job_info = {
-                    "progress": save_progress,
-                    "job_id": job_id,
-                    "role": "local",
-                    "party_id": 0,
-                }
-                logging.info(f"job info: {job_info}")
-            else:
-                return
-
-    def get_count(self, input_file):
-        with open(input_file, "r", encoding="utf-8") as fp:
-            count = 0
-            for line in fp:
-                count += 1
-        return count
-
     def update_table_meta(self, data_head):
         logging.info(f"data head: {data_head}")
         update_schema, id_index = self.get_header_schema(
@@ -383,3 +394,141 @@ class Upload:
         if self.parameters.is_temp_file:
             if os.path.exists(self.parameters.file):
                 os.remove(self.parameters.file)
+
+
+class UploadRange(object):
+    def __init__(self, name, namespace, file, start, end, line_base, delimiter, id_index, extend_sid, fate_uuid):
+        self.name = name
+        self.namespace = namespace
+        self.file = file
+        self.start = start
+        self.end = end
+        # a line takes at least one byte, so the byte offset of the range bounds the lines before it
+        # and keeps the extend sid unique without counting them
+        self.line_base = line_base
+        self.delimiter = delimiter
+        self.id_index = id_index
+        self.extend_sid = extend_sid
+        self.fate_uuid = fate_uuid
+
+
+def get_line_func(extend_sid):
+    if not extend_sid:
+        return Upload.get_data_line
+    else:
+        return Upload.get_sid_data_line
+
+
+def split_file_ranges(input_file, data_offset, processes):
+    size = os.path.getsize(input_file)
+    if size <= data_offset:
+        return []
+    parts = max(min(processes, (size - data_offset) // MIN_RANGE_SIZE), 1)
+    step = (size - data_offset) // parts
+    bounds = [data_offset]
+    with open(input_file, "rb") as fp:
+        while len(bounds) < parts:
+            fp.seek(bounds[-1] + step)
+            # move to the start of the next line
+            fp.readline()
+            position = fp.tell()
+            if position >= size:
+                break
+            bounds.append(position)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+WHITESPACE = frozenset(b" \t\n\r\x0b\x0c")
+
+
+class LineTokenizer(object):
+    """
+    Cut key and value out of a line of the memory mapped file by byte offsets.
+    Only the key and value bytes are copied and decoded, the fields of a line are never split into strings.
+    """
+    def __init__(self, mm, delimiter, id_index, extend_sid, fate_uuid):
+        self.mm = mm
+        self.delimiter = delimiter
+        self.delimiter_bytes = delimiter.encode("utf-8")
+        self.id_index = id_index
+        self.extend_sid = extend_sid
+        self.fate_uuid = fate_uuid
+
+    def __call__(self, start, end, line_index):
+        mm = self.mm
+        if self.extend_sid:
+            return self.fate_uuid + str(line_index), mm[start:end].decode("utf-8")
+        width = len(self.delimiter_bytes)
+        if not self.id_index:
+            position = mm.find(self.delimiter_bytes, start, end)
+            if position == -1:
+                return mm[start:end].decode("utf-8"), ""
+            return mm[start:position].decode("utf-8"), mm[position + width:end].decode("utf-8")
+        key_start = start
+        for _ in range(self.id_index):
+            position = mm.find(self.delimiter_bytes, key_start, end)
+            if position == -1:
+                raise ValueError(f"line {line_index} has less than {self.id_index + 1} fields")
+            key_start = position + width
+        key_end = mm.find(self.delimiter_bytes, key_start, end)
+        if key_end == -1:
+            key_end, suffix = end, b""
+        else:
+            suffix = mm[key_end + width:end]
+        value = b"".join([mm[start:key_start - width], self.delimiter_bytes, suffix])
+        return mm[key_start:key_end].decode("utf-8"), value.decode("utf-8").strip(self.delimiter)
+
+
+def iter_line_spans(mm, start, end):
+    # (start, end) of every line in the range, trailing whitespace excluded
+    position = start
+    while position < end:
+        line_end = mm.find(b"\n", position, end)
+        next_position = end if line_end == -1 else line_end + 1
+        if line_end == -1:
+            line_end = end
+        while line_end > position and mm[line_end - 1] in WHITESPACE:
+            line_end -= 1
+        yield position, line_end
+        position = next_position
+
+
+def range_kv_generator(_range: UploadRange, part_of_data):
+    with open(_range.file, "rb") as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        tokenize = LineTokenizer(mm, _range.delimiter, _range.id_index, _range.extend_sid, _range.fate_uuid)
+        for line_index, (start, end) in enumerate(iter_line_spans(mm, _range.start, _range.end), _range.line_base):
+            k, v = tokenize(start, end, line_index)
+            yield k, v
+            if len(part_of_data) < 100:
+                part_of_data.append((k, v))
+
+
+def upload_range(_range: UploadRange, table=None):
+    """
+    Write one byte range of the input file, returns the number of keys the writes added (None if the engine does not
+    tell) and the first lines of the range. Without a table it runs in a pool process: buffers the pairs by partition and writes every partition
+    on its own, so that the pool processes do not hold the write lock of all the partitions at the same time.
+    """
+    part_of_data = []
+    if table:
+        return table.put_all(range_kv_generator(_range, part_of_data)), part_of_data
+    added = 0
+    with Session() as sess:
+        table = sess.get_table(name=_range.name, namespace=_range.namespace)
+        buffers = {}
+        kv_iter = range_kv_generator(_range, part_of_data)
+        while batch := list(itertools.islice(kv_iter, PARTITION_BUFFER_SIZE)):
+            keys = table.key_serdes.serialize_batch([k for k, _ in batch])
+            for p, kv in zip(table.batch_partitioner(keys, table.partitions), batch):
+                buffers.setdefault(p, []).append(kv)
+                if len(buffers[p]) >= PARTITION_BUFFER_SIZE:
+                    added = add_count(added, table.put_all(buffers.pop(p)))
+        for buffer in buffers.values():
+            added = add_count(added, table.put_all(buffer))
+    return added, part_of_data
+
+
+def add_count(count, added):
+    # unknown once any write does not tell how many keys it added
+    return None if count is None or added is None else count + added
@@ -19,6 +19,7 @@ from fate_flow.entity.code import FederatedSchedulingStatusCode, ReturnCode
 from fate_flow.manager.operation.job_saver import ScheduleJobSaver
 from fate_flow.runtime.runtime_config import RuntimeConfig
 from fate_flow.utils.log_utils import schedule_logger
+from fate_flow.utils.metrics import Metrics
 
 
 def get_tasks_by_task_id(task_id, roles=None):
@@ -39,6 +40,14 @@ def get_tasks_by_task_id(task_id, roles=None):
     return tasks
 
 
+def get_tasks_by_task_ids(job_id, task_ids):
+    task_ids = set(task_ids)
+    return [{"job_id": task.f_job_id, "role": task.f_role, "party_id": task.f_party_id,
+             "component": task.f_component, "task_id": task.f_task_id,
+             "task_version": task.f_task_version} for task in
+            ScheduleJobSaver.query_task(job_id=job_id, only_latest=True) if task.f_task_id in task_ids]
+
+
 def schedule_job(func):
     @wraps(func)
     def _inner(*args, **kwargs):
@@ -51,8 +60,14 @@ def schedule_job(func):
 def federated(func):
     @wraps(func)
     def _inner(*args, **kwargs):
-        federated_response = func(*args, **kwargs)
+        if "job_id" in kwargs:
+            with Metrics.timer("federated", job_id=kwargs.get("job_id"), command=func.__name__):
+                federated_response = func(*args, **kwargs)
+        else:
+            # task commands are timed by @federated_task
+            federated_response = func(*args, **kwargs)
         schedule_logger(kwargs.get("job_id")).info(f"job command '{func.__name__}' return: {federated_response}")
+        count_federated_response(func.__name__, federated_response)
         return return_federated_response(federated_response)
     return _inner
 
@@ -64,7 +79,11 @@ def federated_task(func):
         roles = kwargs.get("roles")
         tasks = get_tasks_by_task_id(task_id, roles)
         if tasks:
-            _return = func(tasks=tasks, *args, **kwargs)
+            with Metrics.timer("federated", job_id=tasks[0]["job_id"], command=func.__name__):
+                _return = func(tasks=tasks, *args, **kwargs)
+            if isinstance(_return, dict):
+                # responses returned through @federated are counted there
+                count_federated_response(func.__name__, _return)
             schedule_logger(tasks[0]["job_id"]).info(f"task command '{func.__name__}' return: {_return}")
             return _return
         else:
@@ -72,6 +91,15 @@ def federated_task(func):
     return _inner
 
 
+def count_federated_response(command, federated_response):
+    # result codes per command and partner
+    for dest_role, parties in federated_response.items():
+        for party_id, response in parties.items():
+            code = response.get("code") if isinstance(response, dict) else None
+            Metrics.inc("fate_flow_federated_response_total", command=command, role=dest_role, party_id=party_id,
+                        code=code)
+
+
 def return_federated_response(federated_response):
     retcode_set = set()
     for dest_role in federated_response.keys():
@@ -104,6 +132,18 @@ class FederatedScheduler:
     def resource_for_job(cls, job_id, roles, operation_type):
         return RuntimeConfig.SCHEDULE_CLIENT.federated.resource_for_job(job_id, roles, operation_type)
 
+    @classmethod
+    def resource_for_jobs(cls, jobs, operation_type):
+        federated_responses = RuntimeConfig.SCHEDULE_CLIENT.federated.resource_for_jobs(
+            jobs=[{"job_id": job.f_job_id, "roles": job.f_parties} for job in jobs],
+            operation_type=operation_type
+        )
+        _return = {}
+        for job_id, federated_response in federated_responses.items():
+            schedule_logger(job_id).info(f"job command 'resource_for_jobs' return: {federated_response}")
+            _return[job_id] = return_federated_response(federated_response)
+        return _return
+
     @classmethod
     @federated
     def start_job(cls, job_id, roles):
@@ -137,6 +177,30 @@ class FederatedScheduler:
     def sync_task_status(cls, task_id, tasks, command_body):
         return RuntimeConfig.SCHEDULE_CLIENT.federated.sync_task_status(tasks=tasks, command_body=command_body)
 
+    @classmethod
+    def collect_tasks(cls, job_id, task_ids):
+        return cls.batch_task_command("collect_tasks", job_id, task_ids,
+                                      RuntimeConfig.SCHEDULE_CLIENT.federated.collect_tasks)
+
+    @classmethod
+    def sync_tasks_status(cls, job_id, tasks_status: dict):
+        return cls.batch_task_command(
+            "sync_tasks_status", job_id, tasks_status.keys(), RuntimeConfig.SCHEDULE_CLIENT.federated.sync_tasks_status,
+            task_bodies={task_id: {"status": status} for task_id, status in tasks_status.items()}
+        )
+
+    @classmethod
+    def batch_task_command(cls, command_name, job_id, task_ids, command, **kwargs):
+        tasks = get_tasks_by_task_ids(job_id, task_ids)
+        if not tasks:
+            schedule_logger(job_id).error(f"{command_name} no found task by task ids {task_ids}")
+            return {}
+        with Metrics.timer("federated", job_id=job_id, command=command_name):
+            federated_responses = command(tasks=tasks, **kwargs)
+        schedule_logger(job_id).info(f"task command '{command_name}' return: {federated_responses}")
+        return {task_id: return_federated_response(federated_response)
+                for task_id, federated_response in federated_responses.items()}
+
     @classmethod
     @federated_task
     def stop_task(cls, task_id,  command_body=None, tasks=None):
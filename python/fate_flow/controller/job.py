@@ -190,7 +190,7 @@ class JobController(object):
 
     @classmethod
     def query_job_list(cls, limit, page, job_id, description, partner, party_id, role, status, order_by, order,
-                       user_name):
+                       user_name, cursor=None, with_count=True):
         # Provided to the job display page
         offset = limit * (page - 1)
         query = {'tag': ('!=', 'submit_failed')}
@@ -200,8 +200,6 @@ class JobController(object):
             query["description"] = ('contains', description)
         if party_id:
             query["party_id"] = ('contains', party_id)
-        # if partner:
-        #     query["parties"] = ('contains', partner)
         if role:
             query["role"] = ('in_', set(role))
         if status:
@@ -215,22 +213,21 @@ class JobController(object):
             by = ['create_time', 'desc']
         if user_name:
             query["user_name"] = ("==", user_name)
-        jobs, count = JobSaver.list_job(limit, offset, query, by)
+        jobs, count, next_cursor = JobSaver.list_job(
+            limit, offset, query, by, partner=partner, cursor=cursor, with_count=with_count
+        )
         jobs = [job.to_human_model_dict() for job in jobs]
-        lst_job = []
         for job in jobs:
             job['partners'] = set()
             for _r in job['parties']:
                 job['partners'].update(_r.get("party_id"))
             job['partners'].discard(job['party_id'])
             job['partners'] = sorted(job['partners'])
-            if partner and str(partner) not in job['partners']:
-                continue
-            lst_job.append(job)
-        return count, lst_job
+        return count, jobs, next_cursor
 
     @classmethod
-    def query_task_list(cls, limit, page, job_id, role, party_id, task_name, order_by, order):
+    def query_task_list(cls, limit, page, job_id, role, party_id, task_name, order_by, order, cursor=None,
+                        with_count=True):
         offset = limit * (page - 1)
 
         query = {}
@@ -250,8 +247,10 @@ class JobController(object):
         if not by:
             by = ['create_time', 'desc']
 
-        tasks, count = JobSaver.list_task(limit, offset, query, by)
-        return count, [task.to_human_model_dict() for task in tasks]
+        tasks, count, next_cursor = JobSaver.list_task(
+            limit, offset, query, by, cursor=cursor, with_count=with_count
+        )
+        return count, [task.to_human_model_dict() for task in tasks], next_cursor
 
     @classmethod
     def query_tasks(cls, **kwargs):
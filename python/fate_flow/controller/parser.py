@@ -13,8 +13,12 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 import copy
+import hashlib
+import json
 import logging
 import os
+import threading
+from collections import OrderedDict
 from typing import Dict, Union, List
 
 import networkx as nx
@@ -26,11 +30,11 @@ from fate_flow.entity.spec.dag import DataWarehouseChannelSpec, ModelWarehouseCh
     PulsarFederationSpec, RabbitMQFederationSpec, FlowLogger, MLMDSpec, TaskRuntimeConfSpec, \
     DAGSchema, DAGSpec, PreTaskConfigSpec, FlowRuntimeInputArtifacts, OutputArtifactType, PartySpec
 from fate_flow.entity.types import EngineType, FederationEngine, DataSet, InputArtifactType, ArtifactSourceType, \
-    ComputingEngine, OSXMode
+    ComputingEngine, OSXMode, TaskStatus
 from fate_flow.manager.service.provider_manager import ProviderManager
 from fate_flow.runtime.job_default_config import JobDefaultConfig
 from fate_flow.runtime.system_settings import ENGINES, PROXY, FATE_FLOW_CONF_PATH, HOST, HTTP_PORT, PROTOCOL, \
-    API_VERSION, COMPUTING_CONF, LOG_LEVEL
+    API_VERSION, COMPUTING_CONF, LOG_LEVEL, JOB_PARSER_CACHE_SIZE
 from fate_flow.utils import job_utils, file_utils
 
 
@@ -772,10 +776,60 @@ class DagParser(object):
         return translate_func(*args, **kwargs)
 
 
+class DependencyIndex(object):
+    """
+    Upstream/downstream adjacency of the job tasks with in-degree counters.
+    Counters only move when a task enters or leaves SUCCESS, so checking readiness
+    costs the number of status changes instead of walking the input artifacts every round.
+    """
+    def __init__(self, upstream: Dict[str, set], order: List[str]):
+        self.order = order
+        self.upstream = upstream
+        self.downstream = {name: set() for name in order}
+        for name, dependencies in upstream.items():
+            for dependency in dependencies:
+                self.downstream[dependency].add(name)
+        self._remaining = {name: len(upstream[name]) for name in order}
+        self._status = {}
+        self._ready = {name for name in order if not self._remaining[name]}
+
+    def update(self, task_name, status):
+        old_status = self._status.get(task_name)
+        if old_status == status:
+            return
+        self._status[task_name] = status
+        if status == TaskStatus.SUCCESS:
+            delta = -1
+        elif old_status == TaskStatus.SUCCESS:
+            # rerun of a finished upstream blocks its successors again
+            delta = 1
+        else:
+            return
+        for successor in self.downstream[task_name]:
+            self._remaining[successor] += delta
+            if self._remaining[successor]:
+                self._ready.discard(successor)
+            else:
+                self._ready.add(successor)
+
+    def sync(self, tasks_status: Dict[str, str]):
+        for task_name, status in tasks_status.items():
+            self.update(task_name, status)
+
+    def is_ready(self, task_name):
+        return task_name in self._ready
+
+    def ready_tasks(self, status=TaskStatus.WAITING):
+        # in topological order, so that siblings start in dag order
+        return [name for name in self.order if name in self._ready and self._status.get(name) == status]
+
+
 class JobParser(object):
     def __init__(self, dag_conf):
+        self.dag_conf = dag_conf
         self.dag_parser = DagParser()
         self.dag_parser.parse_dag(dag_conf)
+        self._dependency_index = None
 
     def get_task_node(self, role, party_id, task_name):
         return self.dag_parser.get_task_node(role, party_id, task_name)
@@ -792,6 +846,16 @@ class JobParser(object):
     def infer_dependent_tasks(self, input_artifacts):
         return self.dag_parser.infer_dependent_tasks(input_artifacts)
 
+    @property
+    def dependency_index(self):
+        if self._dependency_index is None:
+            upstream = {
+                name: set(self.infer_dependent_tasks(task_spec.inputs))
+                for name, task_spec in self.dag_conf.dag.tasks.items()
+            }
+            self._dependency_index = DependencyIndex(upstream=upstream, order=list(self.global_topological_sort()))
+        return self._dependency_index
+
     @property
     def task_parser(self):
         return TaskParser
@@ -835,6 +899,45 @@ class JobParser(object):
         return self.dag_parser.get_component_ref(task_name)
 
 
+class JobParserCache(object):
+    """
+    LRU cache of parsed dags keyed by job id and dag hash.
+    A changed dag of the same job gets a new hash, so a stale parser is never returned.
+    The cached DAGSchema and JobParser are shared and must be treated as read-only.
+    """
+    _cache = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, job_id, dag: dict):
+        if JOB_PARSER_CACHE_SIZE <= 0:
+            dag_schema = DAGSchema(**dag)
+            return dag_schema, JobParser(dag_schema)
+        dag_hash = cls.dag_hash(dag)
+        with cls._lock:
+            cached = cls._cache.get(job_id)
+            if cached and cached[0] == dag_hash:
+                cls._cache.move_to_end(job_id)
+                return cached[1], cached[2]
+        dag_schema = DAGSchema(**dag)
+        job_parser = JobParser(dag_schema)
+        with cls._lock:
+            cls._cache[job_id] = (dag_hash, dag_schema, job_parser)
+            cls._cache.move_to_end(job_id)
+            while len(cls._cache) > JOB_PARSER_CACHE_SIZE:
+                cls._cache.popitem(last=False)
+        return dag_schema, job_parser
+
+    @classmethod
+    def invalidate(cls, job_id):
+        with cls._lock:
+            cls._cache.pop(job_id, None)
+
+    @staticmethod
+    def dag_hash(dag: dict):
+        return hashlib.md5(json.dumps(dag, sort_keys=True, default=str).encode()).hexdigest()
+
+
 class Party(BaseModel):
     role: str
     party_id: Union[str, int]
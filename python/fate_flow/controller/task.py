@@ -18,7 +18,7 @@ import os
 
 import yaml
 
-from fate_flow.controller.parser import JobParser
+from fate_flow.controller.parser import JobParser, JobParserCache
 from fate_flow.db.db_models import Task
 from fate_flow.db.schedule_models import ScheduleTask, ScheduleJob, ScheduleTaskStatus
 from fate_flow.engine.devices import build_engine, EngineABC
@@ -222,8 +222,7 @@ class TaskController(object):
         jobs = JobSaver.query_job(job_id=task.f_job_id, role=task.f_role, party_id=task.f_party_id)
         if not jobs:
             return False
-        dag_schema = DAGSchema(**jobs[0].f_dag)
-        job_parser = JobParser(dag_schema)
+        dag_schema, job_parser = JobParserCache.get(task.f_job_id, jobs[0].f_dag)
         cls.create_task(
             task.f_job_id, task.f_role, task.f_party_id, task.f_task_name, dag_schema, job_parser,
             task_run=task.f_task_run, task_cores=task.f_task_cores, is_scheduler=False, task_version=new_version
@@ -249,8 +248,7 @@ class TaskController(object):
                 )
                 break
             retry_time -= 1
-        dag_schema = DAGSchema(**job.f_dag)
-        job_parser = JobParser(dag_schema)
+        dag_schema, job_parser = JobParserCache.get(job.f_job_id, job.f_dag)
         parties = job_parser.get_task_runtime_parties(task_name=task.f_task_name)
         for party in parties:
             for party_id in party.party_id:
@@ -338,6 +336,14 @@ class TaskController(object):
         else:
             return None
 
+    @classmethod
+    def collect_tasks(cls, job_id, tasks):
+        tasks_info = {}
+        for task in JobSaver.query_task(job_id=job_id, task_id=[task["task_id"] for task in tasks], only_latest=False):
+            tasks_info[(task.f_task_id, task.f_task_version, task.f_role, task.f_party_id)] = \
+                task.to_human_model_dict(only_primary_with=cls.INITIATOR_COLLECT_FIELDS)
+        return tasks_info
+
     @classmethod
     @asynchronous_function
     def stop_task(cls, task: Task, stop_status):
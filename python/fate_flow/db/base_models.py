@@ -390,6 +390,7 @@ def init_database_tables():
         LOGGER.info(f"start create table {obj.__name__}")
         try:
             obj.create_table()
+            create_missing_indexes(obj)
             LOGGER.info(f"create table success: {obj.__name__}")
         except Exception as e:
             LOGGER.exception(e)
@@ -399,6 +400,15 @@ def init_database_tables():
         raise Exception(f"create tables failed: {create_failed_list}")
 
 
+def create_missing_indexes(model):
+    # create_table skips the indexes declared after the table was created, and mysql has no "IF NOT EXISTS"
+    existing = {index.name for index in DB.get_indexes(model._meta.table_name)}
+    for index in model._meta.fields_to_index():
+        if index._name not in existing:
+            LOGGER.info(f"create index {index._name} on {model._meta.table_name}")
+            DB.execute(model._schema._create_index(index, safe=False))
+
+
 def fill_db_model_object(model_object, human_model_dict):
     for k, v in human_model_dict.items():
         attr_name = 'f_%s' % k
@@ -60,6 +60,20 @@ class Job(DataBaseModel):
     class Meta:
         db_table = "t_job"
         primary_key = CompositeKey('f_job_id', 'f_role', 'f_party_id')
+        indexes = (
+            (('f_create_time', 'f_job_id'), False),
+            (('f_status', 'f_create_time'), False),
+        )
+
+
+class JobPartner(DataBaseModel):
+    # all party ids of a job, the job list is filtered by partner through it
+    f_job_id = CharField(max_length=25, index=True)
+    f_party_id = CharField(max_length=50)
+
+    class Meta:
+        db_table = "t_job_partner"
+        primary_key = CompositeKey('f_party_id', 'f_job_id')
 
 
 class Task(DataBaseModel):
@@ -104,6 +118,11 @@ class Task(DataBaseModel):
     class Meta:
         db_table = "t_task"
         primary_key = CompositeKey('f_job_id', 'f_task_id', 'f_task_version', 'f_role', 'f_party_id')
+        indexes = (
+            (('f_task_id', 'f_task_version'), False),
+            (('f_party_status', 'f_run_ip'), False),
+            (('f_run_ip', 'f_run_port', 'f_status'), False),
+        )
 
 
 class TrackingOutputInfo(DataBaseModel):
@@ -0,0 +1,117 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import peewee
+
+from fate_flow.db.base_models import DB
+from fate_flow.db.db_models import Job, Task
+from fate_flow.db.schedule_models import ScheduleJob, ScheduleTask, ScheduleJobLease
+from fate_flow.entity.types import JobStatus, TaskStatus, EndStatus
+from fate_flow.utils.base_utils import current_timestamp
+from fate_flow.utils.log_utils import getLogger
+
+LOGGER = getLogger()
+
+
+class QueryPlanAudit(object):
+    """
+    EXPLAIN of the registered hot queries of the scheduler and detector, the queries that scan a whole table are
+    reported at startup. On mysql the plan depends on the table statistics, a small table may be scanned anyway.
+    """
+    _queries = {}
+
+    @classmethod
+    def register(cls, name, query):
+        """
+        :param query: returns the peewee query to explain
+        """
+        cls._queries[name] = query
+
+    @classmethod
+    @DB.connection_context()
+    def check(cls):
+        full_scans = {}
+        for name, query in cls._queries.items():
+            try:
+                tables = cls.full_scan_tables(query())
+            except Exception as e:
+                LOGGER.exception(e)
+                continue
+            if tables:
+                full_scans[name] = tables
+                LOGGER.warning(f"hot query {name} scans the whole table {tables}, check the indexes")
+        LOGGER.info(f"explain {len(cls._queries)} hot queries, {len(full_scans)} with full table scan")
+        return full_scans
+
+    @classmethod
+    def full_scan_tables(cls, query):
+        sql, params = query.sql()
+        if isinstance(DB, peewee.SqliteDatabase):
+            # detail like "SCAN t_task" ("SCAN TABLE t_task" before sqlite 3.36) or "SEARCH t_task USING INDEX ..."
+            tables = []
+            for row in DB.execute_sql(f"EXPLAIN QUERY PLAN {sql}", params).fetchall():
+                detail = row[-1].split()
+                if detail[0] == "SCAN" and len(detail) > 1:
+                    tables.append(detail[2] if detail[1] == "TABLE" and len(detail) > 2 else detail[1])
+            return tables
+        cursor = DB.execute_sql(f"EXPLAIN {sql}", params)
+        columns = [column[0] for column in cursor.description]
+        return [
+            row[columns.index("table")] for row in cursor.fetchall() if row[columns.index("type")] in {"ALL", "index"}
+        ]
+
+
+QueryPlanAudit.register(
+    "schedule_running_jobs",
+    lambda: ScheduleJob.select().where(ScheduleJob.f_status == JobStatus.RUNNING).order_by(ScheduleJob.f_create_time)
+)
+QueryPlanAudit.register(
+    "schedule_waiting_jobs",
+    lambda: ScheduleJob.select().where(ScheduleJob.f_status == JobStatus.WAITING).order_by(
+        ScheduleJob.f_priority.desc(), ScheduleJob.f_create_time.asc())
+)
+QueryPlanAudit.register(
+    "schedule_rerun_jobs",
+    lambda: ScheduleJob.select().where(ScheduleJob.f_rerun_signal == True).order_by(ScheduleJob.f_create_time)
+)
+QueryPlanAudit.register(
+    "schedule_task_on_all_party",
+    lambda: ScheduleTask.select().where((ScheduleTask.f_task_id == "") & (ScheduleTask.f_task_version == 0))
+)
+QueryPlanAudit.register(
+    "expired_job_leases",
+    lambda: ScheduleJobLease.select().where(ScheduleJobLease.f_expire_time < current_timestamp())
+)
+QueryPlanAudit.register(
+    "detect_running_task",
+    lambda: Task.select().where(Task.f_party_status == TaskStatus.RUNNING)
+)
+QueryPlanAudit.register(
+    "detect_end_task",
+    lambda: Task.select().where(
+        (Task.f_run_ip == "") & (Task.f_run_port == 0) & (Task.f_status << EndStatus.status_list()) &
+        (Task.f_kill_status == False)
+    )
+)
+QueryPlanAudit.register(
+    "task_by_version",
+    lambda: Task.select().where((Task.f_task_id == "") & (Task.f_task_version == 0))
+)
+QueryPlanAudit.register(
+    "detect_resource_record",
+    lambda: Job.select().where(
+        (Job.f_resource_in_use == True) & (Job.f_status << EndStatus.status_list() + [JobStatus.WAITING])
+    )
+)
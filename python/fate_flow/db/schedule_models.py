@@ -46,6 +46,10 @@ class ScheduleJob(DataBaseModel):
     class Meta:
         db_table = "t_schedule_job"
         primary_key = CompositeKey('f_job_id')
+        indexes = (
+            (('f_status', 'f_create_time'), False),
+            (('f_rerun_signal', 'f_create_time'), False),
+        )
 
 
 class ScheduleTask(DataBaseModel):
@@ -67,6 +71,9 @@ class ScheduleTask(DataBaseModel):
     class Meta:
         db_table = "t_schedule_task"
         primary_key = CompositeKey('f_job_id', 'f_task_id', 'f_task_version', 'f_role', 'f_party_id')
+        indexes = (
+            (('f_task_id', 'f_task_version'), False),
+        )
 
 
 class ScheduleTaskStatus(DataBaseModel):
@@ -82,3 +89,12 @@ class ScheduleTaskStatus(DataBaseModel):
         db_table = "t_schedule_task_status"
         primary_key = CompositeKey('f_job_id', 'f_task_id', 'f_task_version')
 
+
+class ScheduleJobLease(DataBaseModel):
+    f_job_id = CharField(max_length=25)
+    f_owner = CharField(max_length=100, index=True)
+    f_expire_time = BigIntegerField(index=True)
+
+    class Meta:
+        db_table = "t_schedule_job_lease"
+        primary_key = CompositeKey('f_job_id')
@@ -184,7 +184,7 @@ class StorageTableABC(metaclass=abc.ABCMeta):
         ...
 
     @abc.abstractmethod
-    def count(self):
+    def count(self, verify=False):
         ...
 
     @abc.abstractmethod
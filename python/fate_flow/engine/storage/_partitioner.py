@@ -46,11 +46,33 @@ def _java_string_like_partitioner(key, total_partitions):
     return int(b)
 
 
+def integer_batch_partitioner(keys, total_partitions):
+    # keys written by the integer serdes are all 8 bytes, hashed by numpy in one pass when available
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    if np is not None and all(len(key) == 8 for key in keys):
+        return (np.frombuffer(b"".join(keys), dtype=">u8") % total_partitions).tolist()
+    return [int.from_bytes(key, "big") % total_partitions for key in keys]
+
+
+def mmh3_batch_partitioner(keys, total_partitions):
+    import mmh3
+
+    _hash = mmh3.hash
+    return [_hash(key) % total_partitions for key in keys]
+
+
 def get_default_partitioner():
     return mmh3_partitioner
     # return _java_string_like_partitioner
 
 
+def get_default_batch_partitioner():
+    return mmh3_batch_partitioner
+
+
 def get_partitioner_by_type(partitioner_type: int):
     if partitioner_type == 0:
         return get_default_partitioner()
@@ -62,6 +84,20 @@ def get_partitioner_by_type(partitioner_type: int):
         raise ValueError(f"partitioner type `{partitioner_type}` not supported")
 
 
+def get_batch_partitioner_by_type(partitioner_type: int):
+    """
+    same partition ids as `get_partitioner_by_type`, for a list of keys at once
+    """
+    if partitioner_type == 0:
+        return get_default_batch_partitioner()
+    elif partitioner_type == 1:
+        return integer_batch_partitioner
+    elif partitioner_type == 2:
+        return mmh3_batch_partitioner
+    else:
+        raise ValueError(f"partitioner type `{partitioner_type}` not supported")
+
+
 def create_partitioner(partitioner_type):
     if partitioner_type is None:
         return mmh3_partitioner
@@ -61,7 +61,8 @@ class StorageSessionBase(StorageSessionABC):
             partitioner_type=partitioner_type,
             **kwargs,
         )
-        table.create_meta(**kwargs)
+        # the table is written by flow itself, so the writers keep its count from the first put_all
+        table.create_meta(**{"count": 0, **kwargs})
         return table
 
     @staticmethod
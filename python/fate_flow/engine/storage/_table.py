@@ -15,7 +15,12 @@
 #
 
 
+import copy
+import itertools
 import operator
+import threading
+import time
+from collections import OrderedDict
 from typing import Iterable, Tuple
 
 import peewee
@@ -25,19 +30,33 @@ from fate_flow.db.storage_models import StorageTableMetaModel
 from fate_flow.engine.relation_ship import Relationship
 from fate_flow.engine.storage._abc import StorageTableMetaABC, StorageTableABC
 from fate_flow.entity.types import AddressABC
+from fate_flow.runtime.system_settings import STORAGE_META_CACHE_SIZE, STORAGE_META_CACHE_TTL
 from fate_flow.utils.base_utils import current_timestamp
 from fate_flow.utils.log import getLogger
-from ._partitioner import get_partitioner_by_type
+from ._partitioner import get_partitioner_by_type, get_batch_partitioner_by_type
 from .serdes import get_serdes_by_type
 
 LOGGER = getLogger("storage")
 
+SERDES_BATCH_SIZE = 1024
+
+
+def _batched_pairs(kv_list: Iterable[Tuple]):
+    it = iter(kv_list)
+    while batch := list(itertools.islice(it, SERDES_BATCH_SIZE)):
+        yield zip(*batch)
+
 
 def _wrapped_iterable_with_serdes(
     kv_list: Iterable[Tuple[bytes, bytes]], key_serdes, value_serdes
 ):
-    for k, v in kv_list:
-        yield key_serdes.serialize(k), value_serdes.serialize(v)
+    for keys, values in _batched_pairs(kv_list):
+        yield from zip(key_serdes.serialize_batch(keys), value_serdes.serialize_batch(values))
+
+
+def _wrapped_iterable_with_deserdes(kv_list: Iterable[Tuple[bytes, bytes]], key_serdes, value_serdes):
+    for keys, values in _batched_pairs(kv_list):
+        yield from zip(key_serdes.deserialize_batch(keys), value_serdes.deserialize_batch(values))
 
 
 class StorageTableBase(StorageTableABC):
@@ -65,6 +84,7 @@ class StorageTableBase(StorageTableABC):
         self._key_serdes = None
         self._value_serdes = None
         self._partitioner = None
+        self._batch_partitioner = None
 
         self._meta = None
         self._read_access_time = None
@@ -88,6 +108,12 @@ class StorageTableBase(StorageTableABC):
             self._partitioner = get_partitioner_by_type(self._partitioner_type)
         return self._partitioner
 
+    @property
+    def batch_partitioner(self):
+        if self._batch_partitioner is None:
+            self._batch_partitioner = get_batch_partitioner_by_type(self._partitioner_type)
+        return self._batch_partitioner
+
     @property
     def name(self):
         return self._name
@@ -176,20 +202,36 @@ class StorageTableBase(StorageTableABC):
         return True
 
     def put_all(self, kv_list: Iterable, **kwargs):
+        """
+        returns the number of keys added to the table, None if the engine does not tell
+        """
         # self._update_write_access_time()
-        self._put_all(
+        added = self._put_all(
             _wrapped_iterable_with_serdes(kv_list, self.key_serdes, self.value_serdes),
             self.partitioner,
             **kwargs
         )
+        if not isinstance(added, int) or isinstance(added, bool):
+            added = None
+        if self.meta:
+            # engines that know how many records a write added keep the stored count up to date
+            if added is not None:
+                self.meta.increase_count(added)
+            else:
+                self.meta.invalidate_count()
+        return added
 
     def collect(self, **kwargs) -> list:
         # self._update_read_access_time()
-        for k, v in self._collect(**kwargs):
-            yield self.key_serdes.deserialize(k), self.value_serdes.deserialize(v)
+        yield from _wrapped_iterable_with_deserdes(self._collect(**kwargs), self.key_serdes, self.value_serdes)
 
-    def count(self):
+    def count(self, verify=False):
+        """
+        the count stored in the table meta, the table is only counted if the count is unknown or verify is set
+        """
         # self._update_read_access_time()
+        if not verify and self.meta and self.meta.count is not None:
+            return self.meta.count
         count = self._count()
         self.meta.update_metas(count=count)
         return count
@@ -204,6 +246,9 @@ class StorageTableBase(StorageTableABC):
 
     # to be implemented
     def _put_all(self, kv_list: Iterable[Tuple[bytes, bytes]], partitioner, **kwargs):
+        """
+        returns the number of records added to the table if the engine knows it, otherwise the stored count is dropped
+        """
         raise NotImplementedError()
 
     def _collect(self, **kwargs) -> list:
@@ -224,6 +269,73 @@ class StorageTableBase(StorageTableABC):
         raise NotImplementedError()
 
 
+class _TableMetaCache(object):
+    """
+    Process local cache of the table meta rows keyed by (namespace, name), stamped with the row update time.
+    Within the ttl a row is served without a query, after it only the update time is selected to decide on a reload.
+    """
+    _lock = threading.Lock()
+    _entries = OrderedDict()
+
+    @classmethod
+    def get(cls, name, namespace):
+        if STORAGE_META_CACHE_SIZE <= 0:
+            return cls._load(name, namespace)
+        key = (namespace, name)
+        now = time.monotonic()
+        with cls._lock:
+            entry = cls._entries.get(key)
+        if entry:
+            data, loaded_at = entry
+            if (now - loaded_at) * 1000 < STORAGE_META_CACHE_TTL or cls._load_version(name, namespace) == data.get(
+                    "f_update_time"):
+                cls._put(key, data, now)
+                return cls._to_row(data)
+        row = cls._load(name, namespace)
+        if row is None:
+            cls.invalidate(name, namespace)
+        else:
+            cls._put(key, copy.deepcopy(row.__data__), now)
+        return row
+
+    @classmethod
+    def invalidate(cls, name, namespace):
+        with cls._lock:
+            cls._entries.pop((namespace, name), None)
+
+    @classmethod
+    def _put(cls, key, data, loaded_at):
+        with cls._lock:
+            cls._entries[key] = (data, loaded_at)
+            cls._entries.move_to_end(key)
+            while len(cls._entries) > STORAGE_META_CACHE_SIZE:
+                cls._entries.popitem(last=False)
+
+    @staticmethod
+    def _to_row(data):
+        # the metas built from a row share its values, every hit gets its own copy
+        row = StorageTableMetaModel()
+        row.__data__ = copy.deepcopy(data)
+        return row
+
+    @staticmethod
+    @DB.connection_context()
+    def _load(name, namespace):
+        return StorageTableMetaModel.select().where(
+            StorageTableMetaModel.f_name == name,
+            StorageTableMetaModel.f_namespace == namespace,
+        ).first()
+
+    @staticmethod
+    @DB.connection_context()
+    def _load_version(name, namespace):
+        row = StorageTableMetaModel.select(StorageTableMetaModel.f_update_time).where(
+            StorageTableMetaModel.f_name == name,
+            StorageTableMetaModel.f_namespace == namespace,
+        ).first()
+        return row.f_update_time if row else None
+
+
 class StorageTableMeta(StorageTableMetaABC):
     def __init__(self, name, namespace, new=False, create_address=True):
         self.name = name
@@ -269,13 +381,11 @@ class StorageTableMeta(StorageTableMetaABC):
             name, namespace = kwargs.get("name"), kwargs.get("namespace")
             if not name or not namespace:
                 return None
-            tables_meta = cls.query_table_meta(
-                filter_fields=dict(name=name, namespace=namespace)
-            )
-            if not tables_meta:
+            table_meta = _TableMetaCache.get(name=name, namespace=namespace)
+            if not table_meta:
                 return None
             self = super().__new__(cls)
-            setattr(self, "table_meta", tables_meta[0])
+            setattr(self, "table_meta", table_meta)
             return self
         else:
             return super().__new__(cls)
@@ -301,6 +411,7 @@ class StorageTableMeta(StorageTableMetaABC):
                     attr_name,
                     v if not issubclass(type(v), AddressABC) else v.__dict__,
                 )
+        _TableMetaCache.invalidate(self.name, self.namespace)
         try:
             rows = table_meta.save(force_insert=True)
             if rows != 1:
@@ -399,18 +510,41 @@ class StorageTableMeta(StorageTableMetaABC):
             operate = table_meta.update(update_fields).where(*update_filters)
         else:
             operate = table_meta.update(update_fields)
-        if count:
+        if count is not None:
             self.count = count
         _return = operate.execute()
+        _TableMetaCache.invalidate(self.name, self.namespace)
         _meta = StorageTableMeta(name=self.name, namespace=self.namespace)
         return _return > 0, _meta
 
+    @DB.connection_context()
+    def increase_count(self, delta):
+        # in sql so that concurrent writers do not lose updates, an unknown count stays unknown
+        StorageTableMetaModel.update(f_count=StorageTableMetaModel.f_count + delta).where(
+            StorageTableMetaModel.f_name == self.name,
+            StorageTableMetaModel.f_namespace == self.namespace,
+            StorageTableMetaModel.f_count.is_null(False),
+        ).execute()
+        _TableMetaCache.invalidate(self.name, self.namespace)
+        if self.count is not None:
+            self.count += delta
+
+    @DB.connection_context()
+    def invalidate_count(self):
+        StorageTableMetaModel.update(f_count=None).where(
+            StorageTableMetaModel.f_name == self.name,
+            StorageTableMetaModel.f_namespace == self.namespace,
+        ).execute()
+        _TableMetaCache.invalidate(self.name, self.namespace)
+        self.count = None
+
     @DB.connection_context()
     def destroy_metas(self):
         StorageTableMetaModel.delete().where(
             StorageTableMetaModel.f_name == self.name,
             StorageTableMetaModel.f_namespace == self.namespace,
         ).execute()
+        _TableMetaCache.invalidate(self.name, self.namespace)
 
     @classmethod
     def create_address(cls, storage_engine, address_dict):
@@ -17,6 +17,7 @@
 import io
 import os
 import struct
+import zlib
 from typing import Iterable, Tuple
 
 from pyarrow import fs
@@ -26,7 +27,12 @@ from fate_flow.utils.log import getLogger
 
 LOGGER = getLogger()
 
+
 class FileCoder:
+    """
+    legacy format: one hex encoded record per line, still read and appended to
+    """
+
     @staticmethod
     def encode(key: bytes, value: bytes):
         size = struct.pack(">Q", len(key))
@@ -41,6 +47,109 @@ class FileCoder:
         return key, value
 
 
+class BlockFileCoder:
+    """
+    binary format: MAGIC, then one segment per put_all, a segment is
+        blocks of length prefixed records, each block: header(flags, payload size, raw size, count) + payload
+        footer: the offset of every block
+        trailer: footer offset, segment start, record count, block count, TRAILER_MAGIC
+    the trailers chain the segments from the end of the file, so the count is read without scanning the records
+    """
+    MAGIC = b"\x00FFB"
+    TRAILER_MAGIC = b"FFBE"
+    BLOCK_HEADER = struct.Struct(">BIII")
+    RECORD_HEADER = struct.Struct(">II")
+    TRAILER = struct.Struct(">QQQI4s")
+    BLOCK_SIZE = 1 << 20
+    FLAG_ZLIB = 1
+
+    @classmethod
+    def write_segment(cls, writer, kv_list, segment_start, compression=None):
+        offsets = []
+        count = 0
+        position = segment_start
+        records, block_size, block_count = [], 0, 0
+
+        def _flush():
+            nonlocal position
+            raw = b"".join(records)
+            flags, payload = 0, raw
+            if compression == "zlib":
+                flags, payload = cls.FLAG_ZLIB, zlib.compress(raw, 1)
+            offsets.append(position)
+            writer.write(cls.BLOCK_HEADER.pack(flags, len(payload), len(raw), block_count))
+            writer.write(payload)
+            position += cls.BLOCK_HEADER.size + len(payload)
+
+        for k, v in kv_list:
+            records.append(cls.RECORD_HEADER.pack(len(k), len(v)))
+            records.append(k)
+            records.append(v)
+            block_size += cls.RECORD_HEADER.size + len(k) + len(v)
+            block_count += 1
+            count += 1
+            if block_size >= cls.BLOCK_SIZE:
+                _flush()
+                records, block_size, block_count = [], 0, 0
+        if records:
+            _flush()
+        footer_offset = position
+        writer.write(struct.pack(f">{len(offsets)}Q", *offsets))
+        writer.write(cls.TRAILER.pack(footer_offset, segment_start, count, len(offsets), cls.TRAILER_MAGIC))
+        return count
+
+    @classmethod
+    def is_block_file(cls, reader):
+        return reader.size() == 0 or reader.read_at(len(cls.MAGIC), 0) == cls.MAGIC
+
+    @classmethod
+    def read_trailers(cls, reader):
+        # [(footer offset, segment start, count, block count)] in file order
+        trailers = []
+        position = reader.size()
+        while position > len(cls.MAGIC):
+            footer_offset, segment_start, count, block_count, magic = cls.TRAILER.unpack(
+                reader.read_at(cls.TRAILER.size, position - cls.TRAILER.size)
+            )
+            if magic != cls.TRAILER_MAGIC:
+                raise ValueError(f"corrupted block file, no segment trailer at {position}")
+            trailers.append((footer_offset, segment_start, count, block_count))
+            position = segment_start
+        trailers.reverse()
+        return trailers
+
+    @classmethod
+    def count(cls, reader):
+        return sum(count for _, _, count, _ in cls.read_trailers(reader))
+
+    @classmethod
+    def iter_blocks(cls, reader):
+        for footer_offset, _, _, block_count in cls.read_trailers(reader):
+            offsets = struct.unpack(f">{block_count}Q", reader.read_at(8 * block_count, footer_offset))
+            for offset in offsets:
+                flags, payload_size, _, count = cls.BLOCK_HEADER.unpack(
+                    reader.read_at(cls.BLOCK_HEADER.size, offset)
+                )
+                payload = reader.read_at(payload_size, offset + cls.BLOCK_HEADER.size)
+                if flags & cls.FLAG_ZLIB:
+                    payload = zlib.decompress(payload)
+                yield count, payload
+
+    @classmethod
+    def iter_records(cls, reader):
+        record_header = cls.RECORD_HEADER
+        for count, payload in cls.iter_blocks(reader):
+            view = memoryview(payload)
+            position = 0
+            for _ in range(count):
+                k_size, v_size = record_header.unpack_from(view, position)
+                position += record_header.size
+                k = bytes(view[position: position + k_size])
+                position += k_size
+                yield k, bytes(view[position: position + v_size])
+                position += v_size
+
+
 class StorageTable(StorageTableBase):
     def __init__(
         self,
@@ -74,7 +183,15 @@ class StorageTable(StorageTableBase):
 
         self._local_fs_client.create_dir(os.path.dirname(self.path))
 
+        segment_start = 0
+        legacy = self._options.get("format") == "hex"
+        counter = 0
         if append and (assume_file_exist or self._exist()):
+            with self._local_fs_client.open_input_file(self.path) as reader:
+                segment_start = reader.size()
+                if segment_start:
+                    # an existing file keeps its own format whatever the option says
+                    legacy = not BlockFileCoder.is_block_file(reader)
             stream = self._local_fs_client.open_append_stream(
                 path=self.path, compression=None
             )
@@ -82,22 +199,43 @@ class StorageTable(StorageTableBase):
             stream = self._local_fs_client.open_output_stream(
                 path=self.path, compression=None
             )
+            # the file is written from scratch, the records are counted from zero
+            self._meta.update_metas(count=0)
 
-        counter = self._meta.get_count() if self._meta.get_count() else 0
-        with io.TextIOWrapper(stream) as writer:
-            for k, v in kv_list:
-                writer.write(FileCoder.encode(k, v))
-                writer.write("\n")
-                counter = counter + 1
-        self._meta.update_metas(count=counter)
+        if legacy:
+            with io.TextIOWrapper(stream) as writer:
+                for k, v in kv_list:
+                    writer.write(FileCoder.encode(k, v))
+                    writer.write("\n")
+                    counter = counter + 1
+        else:
+            with stream as writer:
+                if segment_start == 0:
+                    writer.write(BlockFileCoder.MAGIC)
+                    segment_start = len(BlockFileCoder.MAGIC)
+                counter += BlockFileCoder.write_segment(
+                    writer, kv_list, segment_start, compression=self._options.get("compression")
+                )
+        return counter
 
     def _collect(self, **kwargs) -> list:
-        for line in self._as_generator():
-            yield FileCoder.decode(line.rstrip())
+        for path in self._as_files():
+            with self._local_fs_client.open_input_file(path) as reader:
+                if BlockFileCoder.is_block_file(reader):
+                    yield from BlockFileCoder.iter_records(reader)
+                    continue
+            for line in self._read_lines(path):
+                yield FileCoder.decode(line.rstrip())
 
     def _read(self) -> list:
-        for line in self._as_generator():
-            yield line
+        for path in self._as_files():
+            with self._local_fs_client.open_input_file(path) as reader:
+                if BlockFileCoder.is_block_file(reader):
+                    # framed like the lines of a legacy file, newline included
+                    for k, v in BlockFileCoder.iter_records(reader):
+                        yield FileCoder.encode(k, v) + "\n"
+                    continue
+            yield from self._read_lines(path)
 
     def _destroy(self):
         # use try/catch to avoid stop while deleting an non-exist file
@@ -108,8 +246,13 @@ class StorageTable(StorageTableBase):
 
     def _count(self):
         count = 0
-        for _ in self._as_generator():
-            count += 1
+        for path in self._as_files():
+            with self._local_fs_client.open_input_file(path) as reader:
+                if BlockFileCoder.is_block_file(reader):
+                    count += BlockFileCoder.count(reader)
+                    continue
+            for _ in self._read_lines(path):
+                count += 1
         return count
 
     def close(self):
@@ -119,17 +262,13 @@ class StorageTable(StorageTableBase):
         info = self._local_fs_client.get_file_info([self.path])[0]
         return info.type != fs.FileType.NotFound
 
-    def _as_generator(self):
+    def _as_files(self):
         info = self._local_fs_client.get_file_info([self.path])[0]
         if info.type == fs.FileType.NotFound:
             raise FileNotFoundError(f"file {self.path} not found")
 
         elif info.type == fs.FileType.File:
-            with io.TextIOWrapper(
-                buffer=self._local_fs_client.open_input_stream(self.path), encoding="utf-8"
-            ) as reader:
-                for line in reader:
-                    yield line
+            yield self.path
         else:
             selector = fs.FileSelector(self.path)
             file_infos = self._local_fs_client.get_file_info(selector)
@@ -139,11 +278,11 @@ class StorageTable(StorageTableBase):
                 assert (
                     file_info.is_file
                 ), f"{self.path} is directory contains a subdirectory: {file_info.path}"
-                with io.TextIOWrapper(
-                    buffer=self._local_fs_client.open_input_stream(
-                        f"{self._address.file_path:}/{file_info.path}"
-                    ),
-                    encoding="utf-8",
-                ) as reader:
-                    for line in reader:
-                        yield line
+                yield f"{self._address.file_path:}/{file_info.path}"
+
+    def _read_lines(self, path):
+        with io.TextIOWrapper(
+            buffer=self._local_fs_client.open_input_stream(path), encoding="utf-8"
+        ) as reader:
+            for line in reader:
+                yield line
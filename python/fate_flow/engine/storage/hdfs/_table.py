@@ -94,14 +94,16 @@ class StorageTable(StorageTableBase):
             stream = client.open_output_stream(
                 path=path, compression=None
             )
+            # the file is written from scratch, the records are counted from zero
+            self._meta.update_metas(count=0)
 
-        counter = self._meta.get_count() if self._meta.get_count() else 0
+        counter = 0
         with io.TextIOWrapper(stream) as writer:
             for k, v in kv_list:
                 writer.write(HDFSCoder.encode(k, v))
                 writer.write("\n")
                 counter = counter + 1
-        self._meta.update_metas(count=counter)
+        return counter
 
     def _collect(self, **kwargs) -> list:
         for line in self._as_generator():
@@ -116,8 +118,6 @@ class StorageTable(StorageTableBase):
 
     def _count(self):
         count = 0
-        if self._meta.get_count():
-            return self._meta.get_count()
         for _ in self._as_generator():
             count += 1
         return count
@@ -24,5 +24,13 @@ def get_serdes_by_type(serdes_type: int):
         from ._integer_serdes import get_integer_serdes
 
         return get_integer_serdes()
+    elif serdes_type == 2:
+        from ._string_serdes import get_string_serdes
+
+        return get_string_serdes()
+    elif serdes_type == 3:
+        from ._msgpack_serdes import get_msgpack_serdes
+
+        return get_msgpack_serdes()
     else:
         raise ValueError(f"serdes type `{serdes_type}` not supported")
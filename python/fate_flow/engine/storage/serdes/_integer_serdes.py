@@ -13,6 +13,7 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 #
+import struct
 
 
 def get_integer_serdes():
@@ -28,3 +29,10 @@ class IntegerSerdes:
 
     def deserialize(self, bytes) -> object:
         return int.from_bytes(bytes, "big")
+
+    def serialize_batch(self, objs) -> list:
+        packed = struct.pack(f">{len(objs)}Q", *objs)
+        return [packed[i: i + 8] for i in range(0, len(packed), 8)]
+
+    def deserialize_batch(self, bytes_list) -> list:
+        return list(struct.unpack(f">{len(bytes_list)}Q", b"".join(bytes_list)))
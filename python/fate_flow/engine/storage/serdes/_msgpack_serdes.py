@@ -0,0 +1,42 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+
+def get_msgpack_serdes():
+    try:
+        import msgpack
+    except ImportError:
+        raise ValueError("serdes type `3` requires the msgpack package")
+    return MsgpackSerdes(msgpack)
+
+
+class MsgpackSerdes:
+    def __init__(self, msgpack):
+        self._packer = msgpack.Packer(use_bin_type=True)
+        self._unpackb = msgpack.unpackb
+
+    def serialize(self, obj) -> bytes:
+        return self._packer.pack(obj)
+
+    def deserialize(self, bytes) -> object:
+        return self._unpackb(bytes, raw=False)
+
+    def serialize_batch(self, objs) -> list:
+        return list(map(self._packer.pack, objs))
+
+    def deserialize_batch(self, bytes_list) -> list:
+        unpackb = self._unpackb
+        return [unpackb(b, raw=False) for b in bytes_list]
@@ -0,0 +1,37 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+
+def get_string_serdes():
+    return StringSerdes
+
+
+class StringSerdes:
+    @staticmethod
+    def serialize(obj) -> bytes:
+        return obj.encode("utf-8")
+
+    @staticmethod
+    def deserialize(bytes) -> object:
+        return bytes.decode("utf-8")
+
+    @staticmethod
+    def serialize_batch(objs) -> list:
+        return [obj.encode("utf-8") for obj in objs]
+
+    @staticmethod
+    def deserialize_batch(bytes_list) -> list:
+        return [b.decode("utf-8") for b in bytes_list]
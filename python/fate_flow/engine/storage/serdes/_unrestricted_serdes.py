@@ -29,3 +29,12 @@ class UnrestrictedSerdes:
     @staticmethod
     def deserialize(bytes) -> object:
         return p_loads(bytes)
+
+    @staticmethod
+    def serialize_batch(objs) -> list:
+        # pickle has no batch form, only the typed serdes save work per record
+        return list(map(p_dumps, objs))
+
+    @staticmethod
+    def deserialize_batch(bytes_list) -> list:
+        return list(map(p_loads, bytes_list))
@@ -19,16 +19,20 @@ import itertools
 import logging
 import logging.config
 import os
+import queue
 import shutil
 import signal
+import struct
 import threading
 import time
 import uuid
+from collections import OrderedDict
 from concurrent.futures import ProcessPoolExecutor as Executor
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import ExitStack
 from functools import partial
-from heapq import heapify, heappop, heapreplace
-from operator import is_not
+from heapq import heapify, heappop, heapreplace, merge
+from operator import is_not, itemgetter
 from pathlib import Path
 from typing import Callable, Any, Iterable, Optional
 from typing import List, Tuple, Literal
@@ -41,6 +45,35 @@ PartyMeta = Tuple[Literal["guest", "host", "arbiter", "local"], str]
 logger = logging.getLogger(__name__)
 
 
+class Durability:
+    # fsync on every commit
+    SYNC = "sync"
+    # no fsync on commit, the env is synced once the writer committed all its outputs
+    CHECKPOINT = "checkpoint"
+    # never synced, for the intermediate tables that are dropped after use
+    NO_SYNC = "no_sync"
+
+
+_DEFAULT_DURABILITY = os.getenv("STANDALONE_LMDB_DURABILITY", Durability.CHECKPOINT)
+_WRITEMAP = os.getenv("STANDALONE_LMDB_WRITEMAP", "false").lower() in {"1", "true"}
+
+
+class ShuffleMode:
+    # map outputs written to lmdb sub tables, reduced with a get and put per record
+    LMDB = "lmdb"
+    # map outputs combined in memory and spilled as sorted run files, reduced by a k-way merge
+    SORTED_RUN = "sorted_run"
+
+
+_SHUFFLE_MODE = os.getenv("STANDALONE_SHUFFLE_MODE", ShuffleMode.SORTED_RUN)
+# max bytes of the records combined in memory by a map task before spilling
+_SHUFFLE_BUFFER_BYTES = int(os.getenv("STANDALONE_SHUFFLE_BUFFER_BYTES", 256 * 1024 * 1024))
+# max sorted runs merged at once by a reduce task, more runs are merged in passes to bound the open files
+_SHUFFLE_MERGE_FAN_IN = max(int(os.getenv("STANDALONE_SHUFFLE_MERGE_FAN_IN", 64)), 2)
+# threads reading partitions for count and unordered collect
+_READ_PARALLELISM = int(os.getenv("STANDALONE_READ_PARALLELISM", 8))
+
+
 def _watch_thread_react_to_parent_die(ppid, logger_config):
     """
     this function is call when a process is created, and it will watch parent process and initialize loggers
@@ -202,14 +235,71 @@ class Table(object):
         return list(itertools.islice(self.collect(**kwargs), num))
 
     def count(self):
-        cnt = 0
-        for p in range(self.num_partitions):
+        def _count(p):
             with self._get_env_for_partition(p) as env:
-                cnt += env.stat()["entries"]
-        return cnt
+                return env.stat()["entries"]
+
+        if self.num_partitions <= 1:
+            return sum(map(_count, range(self.num_partitions)))
+        with ThreadPoolExecutor(max_workers=min(_READ_PARALLELISM, self.num_partitions)) as pool:
+            return sum(pool.map(_count, range(self.num_partitions)))
 
     # noinspection PyUnusedLocal
-    def collect(self, **kwargs):
+    def collect(self, ordered=True, batch_size=1024, **kwargs):
+        """
+        ordered: merge the partitions into one stream sorted by key,
+        bulk readers that don't care about the order may pass False to read the partitions
+        in parallel and get the batches as they come
+        """
+        if ordered:
+            return self._collect_ordered()
+        return self._collect_unordered(batch_size)
+
+    def _collect_unordered(self, batch_size):
+        batches = queue.Queue(maxsize=2 * _READ_PARALLELISM)
+        stop = threading.Event()
+
+        def _put(item):
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def _read(p):
+            try:
+                with self._get_env_for_partition(p) as env:
+                    with env.begin() as txn:
+                        with txn.cursor() as cursor:
+                            it = iter(cursor)
+                            while batch := list(itertools.islice(it, batch_size)):
+                                if not _put(batch):
+                                    return
+                _put(None)
+            except Exception as e:
+                _put(e)
+
+        # a pool per call: readers blocked on a slow consumer must not hold threads other reads wait for
+        pool = ThreadPoolExecutor(max_workers=min(_READ_PARALLELISM, self.num_partitions))
+        try:
+            for p in range(self.num_partitions):
+                pool.submit(_read, p)
+            finished = 0
+            while finished < self.num_partitions:
+                item = batches.get()
+                if item is None:
+                    finished += 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield from item
+        finally:
+            stop.set()
+            pool.shutdown(wait=False)
+
+    def _collect_ordered(self):
         iterators = []
         with ExitStack() as s:
             for p in range(self.num_partitions):
@@ -370,10 +460,11 @@ class Table(object):
         intermediate_name = str(uuid.uuid1())
         intermediate_namespace = self._namespace
         intermediate_data_dir = self._data_dir
+        sorted_run = _SHUFFLE_MODE == ShuffleMode.SORTED_RUN
         self._session._submit_map_reduce_partitions_with_index(
-            _do_mrwi_map_and_shuffle_write,
+            _do_mrwi_map_and_sorted_run_write if sorted_run else _do_mrwi_map_and_shuffle_write,
             mapper=map_partition_op,
-            reducer=None,
+            reducer=reduce_partition_op if sorted_run else None,
             input_data_dir=self._data_dir,
             input_num_partitions=self.num_partitions,
             input_name=self._name,
@@ -383,11 +474,12 @@ class Table(object):
             output_name=intermediate_name,
             output_namespace=intermediate_namespace,
             output_partitioner=output_partitioner,
+            output_durability=Durability.NO_SYNC,
         )
         # Step 2: do shuffle read and reduce
         # noinspection PyProtectedMember
         self._session._submit_map_reduce_partitions_with_index(
-            _do_mrwi_shuffle_read_and_reduce,
+            _do_mrwi_sorted_run_read_and_reduce if sorted_run else _do_mrwi_shuffle_read_and_reduce,
             mapper=None,
             reducer=reduce_partition_op,
             input_data_dir=intermediate_data_dir,
@@ -411,16 +503,18 @@ class Table(object):
             partitioner_type=output_partitioner_type,
         )
 
-        # drop cache table
-        for p in range(self._partitions):
+        # drop cache table, the sorted runs are plain files
+        for p in range(0 if sorted_run else self._partitions):
             with _get_env_with_data_dir(
-                    intermediate_data_dir, intermediate_namespace, intermediate_name, str(p), write=True
+                    intermediate_data_dir, intermediate_namespace, intermediate_name, str(p), write=True,
+                    durability=Durability.NO_SYNC,
             ) as env:
                 db = env.open_db()
                 with env.begin(write=True) as txn:
                     txn.drop(db)
 
         path = Path(self._data_dir).joinpath(intermediate_namespace, intermediate_name)
+        _ENV_CACHE.invalidate(path)
         shutil.rmtree(path, ignore_errors=True)
         return output
 
@@ -446,19 +540,36 @@ class Table(object):
         p = partitioner(k_bytes, self._partitions)
         with self._get_env_for_partition(p, write=True) as env:
             with env.begin(write=True) as txn:
-                return txn.put(k_bytes, v_bytes)
+                rtn = txn.put(k_bytes, v_bytes)
+            _checkpoint(env)
+            return rtn
 
-    def put_all(self, kv_list: Iterable[Tuple[bytes, bytes]], partitioner: Callable[[bytes, int], int]):
+    def put_all(
+            self,
+            kv_list: Iterable[Tuple[bytes, bytes]],
+            partitioner: Callable[[bytes, int], int],
+            batch_partitioner: Callable[[List[bytes], int], List[int]] = None,
+    ) -> int:
+        """
+        returns the number of added keys, overwritten keys are not counted
+        """
         txn_map = {}
+        added = 0
         with ExitStack() as s:
-            for p in range(self._partitions):
-                env = s.enter_context(self._get_env_for_partition(p, write=True))
-                txn_map[p] = env, env.begin(write=True)
             try:
-                for k_bytes, v_bytes in kv_list:
-                    p = partitioner(k_bytes, self._partitions)
+                for p, k_bytes, v_bytes in _iter_with_partition_id(
+                        kv_list, self._partitions, partitioner, batch_partitioner
+                ):
+                    if p not in txn_map:
+                        # only lock the partitions that are written
+                        env = s.enter_context(self._get_env_for_partition(p, write=True))
+                        txn = env.begin(write=True)
+                        txn_map[p] = env, txn
+                        added -= txn.stat(env.open_db())["entries"]
                     if not txn_map[p][1].put(k_bytes, v_bytes):
                         break
+                for p, (env, txn) in txn_map.items():
+                    added += txn.stat(env.open_db())["entries"]
             except Exception as e:
                 for p, (env, txn) in txn_map.items():
                     txn.abort()
@@ -466,6 +577,9 @@ class Table(object):
             else:
                 for p, (env, txn) in txn_map.items():
                     txn.commit()
+                for p, (env, txn) in txn_map.items():
+                    _checkpoint(env)
+        return added
 
     def get(self, k_bytes: bytes, partitioner: Callable[[bytes, int], int]) -> bytes:
         p = partitioner(k_bytes, self._partitions)
@@ -478,9 +592,11 @@ class Table(object):
         with self._get_env_for_partition(p, write=True) as env:
             with env.begin(write=True) as txn:
                 old_value_bytes = txn.get(k_bytes)
-                if txn.delete(k_bytes):
-                    return old_value_bytes
+                deleted = txn.delete(k_bytes)
+            if not deleted:
                 return None
+            _checkpoint(env)
+            return old_value_bytes
 
 
 # noinspection PyMethodMayBeStatic
@@ -587,9 +703,11 @@ class Session(object):
         if not namespace_dir.is_dir():
             return
         if name == "*":
+            _ENV_CACHE.invalidate(namespace_dir)
             shutil.rmtree(namespace_dir, True)
             return
         for table in namespace_dir.glob(name):
+            _ENV_CACHE.invalidate(table)
             shutil.rmtree(table, True)
 
     def stop(self):
@@ -630,10 +748,16 @@ class Session(object):
             output_name,
             output_namespace,
             output_partitioner=None,
+            output_durability=None,
     ):
         input_info = _TaskInputInfo(input_data_dir, input_namespace, input_name, input_num_partitions)
         output_info = _TaskOutputInfo(
-            output_data_dir, output_namespace, output_name, output_num_partitions, partitioner=output_partitioner
+            output_data_dir,
+            output_namespace,
+            output_name,
+            output_num_partitions,
+            partitioner=output_partitioner,
+            durability=output_durability,
         )
         return self._submit_process(
             _do_func,
@@ -796,6 +920,17 @@ def _create_table(
     )
 
 
+def _iter_with_partition_id(kv_list, partitions, partitioner, batch_partitioner=None, batch_size=1024):
+    if batch_partitioner is None:
+        for k_bytes, v_bytes in kv_list:
+            yield partitioner(k_bytes, partitions), k_bytes, v_bytes
+        return
+    it = iter(kv_list)
+    while batch := list(itertools.islice(it, batch_size)):
+        keys = [k_bytes for k_bytes, _ in batch]
+        yield from zip(batch_partitioner(keys, partitions), keys, (v_bytes for _, v_bytes in batch))
+
+
 def _load_table(session, data_dir: str, name: str, namespace: str, need_cleanup=False):
     table_meta = _TableMetaManager.get_table_meta(data_dir, namespace, name)
     if table_meta is None:
@@ -825,15 +960,23 @@ class _TaskInputInfo:
 
 
 class _TaskOutputInfo:
-    def __init__(self, data_dir: str, namespace: str, name: str, num_partitions: int, partitioner):
+    def __init__(self, data_dir: str, namespace: str, name: str, num_partitions: int, partitioner, durability=None):
         self.data_dir = data_dir
         self.namespace = namespace
         self.name = name
         self.num_partitions = num_partitions
         self.partitioner = partitioner
+        self.durability = durability
 
     def get_env(self, pid, write=True):
-        return _get_env_with_data_dir(self.data_dir, self.namespace, self.name, str(pid), write=write)
+        return _get_env_with_data_dir(
+            self.data_dir, self.namespace, self.name, str(pid), write=write, durability=self.durability
+        )
+
+    def checkpoint(self, pids):
+        for pid in pids:
+            with self.get_env(pid) as env:
+                _checkpoint(env, self.durability)
 
     def get_partition_id(self, key):
         if self.partitioner is None:
@@ -922,6 +1065,7 @@ class _MapReduceProcess:
         self.input_info = input_info
         self.output_info = output_info
         self.operator_info = operator_info
+        self.output_pids = []
 
     def get_input_partition_num(self):
         return self.input_info.num_partitions
@@ -948,8 +1092,13 @@ class _MapReduceProcess:
         return pid < self.input_info.num_partitions
 
     def get_output_transaction(self, pid, stack: ExitStack):
+        self.output_pids.append(pid)
         return stack.enter_context(stack.enter_context(self.get_output_env(pid, write=True)).begin(write=True))
 
+    def checkpoint_output(self):
+        # called after the output transactions are committed
+        self.output_info.checkpoint(self.output_pids)
+
     def get_output_partition_id(self, key: bytes):
         return self.output_info.get_partition_id(key)
 
@@ -974,6 +1123,7 @@ class _BinarySortedMapProcess:
         self.second_input = second_input_info
         self.output_info = output_info
         self.operator_info = operator_info
+        self.output_pids = []
 
     def get_input_partition_num(self):
         return self.first_input.num_partitions
@@ -1009,8 +1159,13 @@ class _BinarySortedMapProcess:
         )
 
     def get_output_transaction(self, pid, stack: ExitStack):
+        self.output_pids.append(pid)
         return stack.enter_context(stack.enter_context(self.get_output_env(pid, write=True)).begin(write=True))
 
+    def checkpoint_output(self):
+        # called after the output transactions are committed
+        self.output_info.checkpoint(self.output_pids)
+
     def get_output_partition_id(self, key: bytes):
         return self.output_info.get_partition_id(key)
 
@@ -1018,12 +1173,148 @@ class _BinarySortedMapProcess:
         return self.operator_info.get_mapper()
 
 
-def _get_env_with_data_dir(data_dir: str, *args, write=False):
+def _get_env_with_data_dir(data_dir: str, *args, write=False, durability=None):
     _path = Path(data_dir).joinpath(*args)
-    return _open_env(_path, write=write)
+    return _ENV_CACHE.acquire(_path, write=write, durability=durability or _DEFAULT_DURABILITY)
+
+
+def _checkpoint(env, durability=None):
+    # flush the committed transactions of an env opened without sync
+    if (durability or _DEFAULT_DURABILITY) == Durability.CHECKPOINT:
+        env.sync(True)
+
+
+class _CachedEnv:
+    def __init__(self, key, env, file_id):
+        self.key = key
+        self.env = env
+        self.file_id = file_id
+        self.refs = 0
+        self.stale = False
+
+
+class _EnvRef:
+    """
+    A counted reference to a cached env, used as the env context manager was: leaving the context
+    releases the reference instead of closing the env. Attribute access goes to the env, so long-lived holders
+    that never enter the context keep the env pinned in the cache.
+    """
+
+    def __init__(self, cache: "_EnvCache", entry: _CachedEnv):
+        self._cache = cache
+        self._entry = entry
+        self._released = False
+
+    def __enter__(self):
+        return self._entry.env
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if not self._released:
+            self._released = True
+            self._cache.release(self._entry)
+
+    def __getattr__(self, item):
+        return getattr(self._entry.env, item)
+
+
+class _EnvCache:
+    """
+    Per-process LRU cache of opened lmdb envs keyed by (path, write).
+    Envs in use are never closed: they are closed on eviction or invalidation once the last reference is released.
+    An env whose data file was replaced by another process (destroyed and created again) is reopened.
+    """
 
+    def __init__(self, capacity: int):
+        self._capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._orphans = []
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
 
-def _open_env(path, write=False):
+    @staticmethod
+    def _file_id(path: Path):
+        try:
+            stat = path.joinpath("data.mdb").stat()
+            return stat.st_dev, stat.st_ino
+        except FileNotFoundError:
+            return None
+
+    def acquire(self, path: Path, write=False, durability=Durability.SYNC) -> _EnvRef:
+        """
+        the durability only applies when the env is opened, a path is always written with the same durability
+        """
+        if self._capacity <= 0:
+            return _EnvRef(self, self._open(path, write, durability))
+        file_id = self._file_id(path)
+        with self._lock:
+            # a reader can share the env of a writer, lmdb envs should not be opened twice in one process
+            for key in ([(path, True)] if write else [(path, False), (path, True)]):
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry.file_id == file_id:
+                    entry.refs += 1
+                    self._entries.move_to_end(key)
+                    return _EnvRef(self, entry)
+                self._discard(entry)
+        entry = self._open(path, write, durability)
+        with self._lock:
+            if entry.key in self._entries:
+                # opened by another thread meanwhile
+                self._discard(self._entries[entry.key])
+            self._entries[entry.key] = entry
+            entry.refs += 1
+            self._evict()
+        return _EnvRef(self, entry)
+
+    def _open(self, path: Path, write, durability):
+        env = _open_env(path, write=write, durability=durability)
+        return _CachedEnv((path, write), env, self._file_id(path))
+
+    def release(self, entry: _CachedEnv):
+        if self._capacity <= 0:
+            entry.env.close()
+            return
+        with self._lock:
+            entry.refs -= 1
+            if entry.stale and entry.refs <= 0:
+                entry.env.close()
+
+    def invalidate(self, path: Path):
+        # close the envs of the path and of all the paths under it
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if key[0] == path or path in key[0].parents:
+                    self._discard(entry)
+
+    def _discard(self, entry: _CachedEnv):
+        if self._entries.get(entry.key) is entry:
+            del self._entries[entry.key]
+        entry.stale = True
+        if entry.refs <= 0:
+            entry.env.close()
+
+    def _evict(self):
+        if len(self._entries) <= self._capacity:
+            return
+        for key, entry in list(self._entries.items()):
+            if len(self._entries) <= self._capacity:
+                break
+            if entry.refs <= 0:
+                self._discard(entry)
+
+    def _reset_after_fork(self):
+        # envs opened by the parent must not be used or closed in the child
+        self._orphans.extend(self._entries.values())
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+
+_ENV_CACHE = _EnvCache(capacity=int(os.getenv("STANDALONE_ENV_CACHE_SIZE", 128)))
+
+
+def _open_env(path, write=False, durability=Durability.SYNC):
     path.mkdir(parents=True, exist_ok=True)
 
     t = 0
@@ -1035,7 +1326,9 @@ def _open_env(path, write=False):
                 max_dbs=1,
                 max_readers=1024,
                 lock=write,
-                sync=True,
+                sync=durability == Durability.SYNC,
+                metasync=durability != Durability.NO_SYNC,
+                writemap=write and _WRITEMAP,
                 map_size=10_737_418_240,
             )
             return env
@@ -1061,7 +1354,8 @@ def _do_mrwi_no_shuffle(p: _MapReduceProcess):
         v = p.get_mapper()(p.partition_id, _generator_from_cursor(cursor))
         for k1, v1 in v:
             dst_txn.put(k1, v1)
-        return rtn
+    p.checkpoint_output()
+    return rtn
 
 
 def _do_mrwi_shuffle_no_reduce(p: _MapReduceProcess):
@@ -1076,6 +1370,7 @@ def _do_mrwi_shuffle_no_reduce(p: _MapReduceProcess):
             for k_bytes, v_bytes in output_kv_iter:
                 partition_id = p.get_output_partition_id(k_bytes)
                 txn_map[partition_id].put(k_bytes, v_bytes)
+        p.checkpoint_output()
     return rtn
 
 
@@ -1090,7 +1385,8 @@ def _do_binary_sorted_map_with_index(p: _BinarySortedMapProcess):
         )
         for k_bytes, v_bytes in output_kv_iter:
             dst_txn.put(k_bytes, v_bytes)
-        return rtn
+    p.checkpoint_output()
+    return rtn
 
 
 def _serialize_shuffle_write_key(iteration_index: int, k_bytes: bytes) -> bytes:
@@ -1126,6 +1422,7 @@ def _do_mrwi_map_and_shuffle_write(p: _MapReduceProcess):
                 shuffle_write_txn_map[p.get_output_partition_id(k_bytes)].put(
                     _serialize_shuffle_write_key(index, k_bytes), v_bytes, overwrite=False
                 )
+        p.checkpoint_output()
     return rtn
 
 
@@ -1143,6 +1440,131 @@ def _do_mrwi_shuffle_read_and_reduce(p: _MapReduceProcess):
                     dst_txn.put(key, v_bytes)
                 else:
                     dst_txn.put(key, reducer(old, v_bytes))
+    p.checkpoint_output()
+    return rtn
+
+
+def _get_sorted_run_dir(info, source_partition_id: int, destination_partition_id: int) -> Path:
+    return Path(info.data_dir).joinpath(
+        info.namespace, info.name, _get_shuffle_partition_id(source_partition_id, destination_partition_id)
+    )
+
+
+def _write_sorted_run(path: Path, kv_iter):
+    # kv_iter yields the pairs in key order
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        for k_bytes, v_bytes in kv_iter:
+            f.write(struct.pack(">II", len(k_bytes), len(v_bytes)))
+            f.write(k_bytes)
+            f.write(v_bytes)
+
+
+def _read_sorted_run(path: Path, order):
+    # yields (key, order, value), the order keeps the merge stable and is unique so values are never compared
+    with open(path, "rb", buffering=1024 * 1024) as f:
+        while header := f.read(8):
+            k_len, v_len = struct.unpack(">II", header)
+            yield f.read(k_len), order, f.read(v_len)
+
+
+def _merge_sorted_runs(runs, reducer):
+    """
+    yields the (key, value) of the runs [(order, path)] in key order, the values of a key reduced in run order
+    """
+    merged = merge(*[_read_sorted_run(path, order) for order, path in runs])
+    for key, group in itertools.groupby(merged, key=itemgetter(0)):
+        value = None
+        for _, _, v_bytes in group:
+            value = v_bytes if value is None else reducer(value, v_bytes)
+        yield key, value
+
+
+def _merge_sorted_runs_in_passes(runs, reducer, work_dir: Path):
+    # adjacent runs are merged into one run per pass, so the run order and the open files stay bounded
+    runs = sorted(runs)
+    merge_pass = 0
+    while len(runs) > _SHUFFLE_MERGE_FAN_IN:
+        merged_runs = []
+        for i in range(0, len(runs), _SHUFFLE_MERGE_FAN_IN):
+            group = runs[i: i + _SHUFFLE_MERGE_FAN_IN]
+            if len(group) == 1:
+                merged_runs.append(group[0])
+                continue
+            path = work_dir.joinpath(f"{merge_pass}_{i}.run")
+            _write_sorted_run(path, _merge_sorted_runs(group, reducer))
+            merged_runs.append((group[0][0], path))
+        runs = merged_runs
+        merge_pass += 1
+    return _merge_sorted_runs(runs, reducer)
+
+
+# approximate memory of a buffered entry besides the key and value bytes: dict slot and bytes object headers
+_BUFFER_ENTRY_OVERHEAD = 128
+
+
+def _do_mrwi_map_and_sorted_run_write(p: _MapReduceProcess):
+    rtn = p.output_info
+    if p.has_partition(p.partition_id):
+        reducer = p.get_reducer()
+        buffers = {}
+        buffered_bytes = 0
+        run_index = 0
+
+        def _spill():
+            for output_partition_id, buffer in buffers.items():
+                run_dir = _get_sorted_run_dir(p.output_info, p.partition_id, output_partition_id)
+                _write_sorted_run(run_dir.joinpath(f"{run_index}.run"), ((k, buffer[k]) for k in sorted(buffer)))
+            buffers.clear()
+
+        with ExitStack() as s:
+            cursor = p.get_input_cursor(s)
+            output_kv_iter = p.get_mapper()(p.partition_id, _generator_from_cursor(cursor))
+            for k_bytes, v_bytes in output_kv_iter:
+                # combine on the map side
+                buffer = buffers.setdefault(p.get_output_partition_id(k_bytes), {})
+                if (old := buffer.get(k_bytes)) is None:
+                    buffer[k_bytes] = v_bytes
+                    buffered_bytes += len(k_bytes) + len(v_bytes) + _BUFFER_ENTRY_OVERHEAD
+                else:
+                    buffer[k_bytes] = reducer(old, v_bytes)
+                    buffered_bytes += len(buffer[k_bytes]) - len(old)
+                if buffered_bytes >= _SHUFFLE_BUFFER_BYTES:
+                    _spill()
+                    buffered_bytes = 0
+                    run_index += 1
+        _spill()
+    return rtn
+
+
+def _do_mrwi_sorted_run_read_and_reduce(p: _MapReduceProcess):
+    rtn = p.output_info
+    if p.partition_id >= p.get_output_partition_num():
+        return rtn
+    reducer = p.get_reducer()
+    runs = []
+    for input_partition_id in range(p.get_input_partition_num()):
+        run_dir = _get_sorted_run_dir(p.input_info, input_partition_id, p.partition_id)
+        if not run_dir.exists():
+            continue
+        for run in run_dir.iterdir():
+            runs.append(((input_partition_id, int(run.stem)), run))
+    work_dir = Path(p.input_info.data_dir).joinpath(
+        p.input_info.namespace, p.input_info.name, f"merge_{p.partition_id}"
+    )
+    with ExitStack() as s:
+        dst_txn = p.get_output_transaction(p.partition_id, s)
+        dst_cursor = s.enter_context(dst_txn.cursor())
+        # keys come out of the merge in lmdb order, so an empty output is appended to
+        append = not dst_cursor.first()
+        for key, value in _merge_sorted_runs_in_passes(runs, reducer, work_dir):
+            if append:
+                dst_cursor.put(key, value, append=True)
+            elif (old := dst_txn.get(key)) is None:
+                dst_txn.put(key, value)
+            else:
+                dst_txn.put(key, reducer(old, value))
+    p.checkpoint_output()
     return rtn
 
 
@@ -1201,7 +1623,9 @@ class _FederationMetaManager:
 
     def _get_env(self, name):
         if name not in self._env:
-            self._env[name] = _get_env_with_data_dir(self._data_dir, self.session_id, name, str(0), write=True)
+            self._env[name] = _get_env_with_data_dir(
+                self._data_dir, self.session_id, name, str(0), write=True, durability=Durability.SYNC
+            )
         return self._env[name]
 
     def _get(self, name: str, key: bytes) -> bytes:
@@ -1235,7 +1659,9 @@ class _TableMetaManager:
     @classmethod
     def _get_or_create_meta_env(cls, data_dir: str, p):
         if p not in cls._env:
-            cls._env[p] = _get_env_with_data_dir(data_dir, cls.namespace, cls.name, str(p), write=True)
+            cls._env[p] = _get_env_with_data_dir(
+                data_dir, cls.namespace, cls.name, str(p), write=True, durability=Durability.SYNC
+            )
         return cls._env[p]
 
     @classmethod
@@ -1275,6 +1701,7 @@ class _TableMetaManager:
         with env.begin(write=True) as txn:
             txn.delete(k_bytes)
         path = Path(data_dir).joinpath(namespace, name)
+        _ENV_CACHE.invalidate(path)
         shutil.rmtree(path, ignore_errors=True)
 
 
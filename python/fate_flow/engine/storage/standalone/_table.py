@@ -54,7 +54,7 @@ class StorageTable(StorageTableBase):
         self._table = table
 
     def _put_all(self, kv_list: Iterable, partitioner, **kwargs):
-        return self._table.put_all(kv_list, partitioner)
+        return self._table.put_all(kv_list, partitioner, batch_partitioner=self.batch_partitioner)
 
     def _collect(self, **kwargs):
         return self._table.collect(**kwargs)
@@ -51,6 +51,11 @@ class BaseStateTransitionRule(object):
         else:
             return True
 
+    @classmethod
+    def sources(cls, dest_status):
+        # the states that are allowed to transit to dest status
+        return [src_status for src_status, dest_status_list in cls.RULES.items() if dest_status in dest_status_list]
+
 
 class JobStatus(BaseStatus):
     READY = StatusSet.READY
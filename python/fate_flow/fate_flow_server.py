@@ -16,6 +16,7 @@
 import os
 import signal
 import sys
+import threading
 import traceback
 
 import grpc
@@ -26,20 +27,26 @@ if __name__ == '__main__':
     init_casbin()
 
 from fate_flow.apps import app
+from fate_flow.manager.operation.job_saver import JobSaver
+from fate_flow.manager.operation.write_behind import WriteBehind, WriteBehindFlusher
 from fate_flow.manager.service.config_manager import ConfigManager
 from fate_flow.hook import HookManager
 from fate_flow.manager.service.app_manager import AppManager
 from fate_flow.manager.service.provider_manager import ProviderManager
-from fate_flow.manager.service.service_manager import service_db
+from fate_flow.manager.service.service_manager import service_db, instance_id
 from fate_flow.runtime.runtime_config import RuntimeConfig
 from fate_flow.db.base_models import init_database_tables as init_flow_db
+from fate_flow.db.query_plan import QueryPlanAudit
 from fate_flow.scheduler.detector import Detector, FederatedDetector
 from fate_flow.entity.types import ProcessRole
 from fate_flow.scheduler import init_scheduler
 from fate_flow.runtime.system_settings import (
     GRPC_PORT, GRPC_SERVER_MAX_WORKERS, HOST, HTTP_PORT , GRPC_OPTIONS, FATE_FLOW_LOG_DIR,
-    LOG_LEVEL,
+    LOG_LEVEL, SCHEDULE_EVENT_DRIVEN, SCHEDULE_INTERVAL, SCHEDULE_SWEEP_INTERVAL, SCHEDULE_LEASE_RENEW_INTERVAL,
+    WRITE_BEHIND_INTERVAL, QUERY_PLAN_AUDIT
 )
+from fate_flow.scheduler.event import ScheduleEventLoop, ScheduleTicker
+from fate_flow.scheduler.lease import LeaseRenewer
 from fate_flow.scheduler.scheduler import DAGScheduler
 from fate_flow.utils import process_utils
 from fate_flow.utils.grpc_utils import UnaryService
@@ -53,6 +60,15 @@ detect_logger = getLogger("fate_flow_detect")
 stat_logger = getLogger("fate_flow_stat")
 
 
+def flush_and_terminate(signum, frame):
+    # the pending updates are written before the default termination
+    try:
+        WriteBehind.flush()
+    finally:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+
 def server_init():
     # init logs
     LoggerFactory.set_directory(FATE_FLOW_LOG_DIR)
@@ -71,10 +87,13 @@ def server_init():
 
     # init db
     init_flow_db()
+    stat_logger.info(f"fill the partners of {JobSaver.fill_job_partners()} jobs")
+    if QUERY_PLAN_AUDIT:
+        QueryPlanAudit.check()
 
     # runtime config
     RuntimeConfig.init_env()
-    RuntimeConfig.init_config(JOB_SERVER_HOST=HOST, HTTP_PORT=HTTP_PORT)
+    RuntimeConfig.init_config(JOB_SERVER_HOST=HOST, HTTP_PORT=HTTP_PORT, INSTANCE_ID=instance_id)
     RuntimeConfig.init_config()
     RuntimeConfig.set_service_db(service_db())
     RuntimeConfig.SERVICE_DB.register_flow()
@@ -90,7 +109,21 @@ def server_init():
     # detector
     Detector(interval=5 * 1000, logger=detect_logger).start()
     FederatedDetector(interval=10 * 1000, logger=detect_logger).start()
-    DAGScheduler(interval=2 * 1000, logger=schedule_logger()).start()
+    LeaseRenewer(interval=SCHEDULE_LEASE_RENEW_INTERVAL, logger=schedule_logger()).start()
+    if WRITE_BEHIND_INTERVAL:
+        WriteBehind.enable()
+        WriteBehindFlusher(interval=WRITE_BEHIND_INTERVAL, logger=schedule_logger()).start()
+        if "win" not in sys.platform.lower():
+            signal.signal(signal.SIGTERM, flush_and_terminate)
+    if SCHEDULE_EVENT_DRIVEN:
+        schedule_lock = threading.Lock()
+        dag_scheduler = DAGScheduler(interval=SCHEDULE_SWEEP_INTERVAL, logger=schedule_logger(), lock=schedule_lock)
+        dag_scheduler.start()
+        ScheduleTicker(handler=dag_scheduler.schedule_silent_jobs, interval=SCHEDULE_INTERVAL,
+                       logger=schedule_logger(), lock=schedule_lock).start()
+        ScheduleEventLoop(handler=dag_scheduler.schedule_jobs, lock=schedule_lock, logger=schedule_logger()).start()
+    else:
+        DAGScheduler(interval=SCHEDULE_INTERVAL, logger=schedule_logger()).start()
 
     # provider register
     ProviderManager.register_default_providers()
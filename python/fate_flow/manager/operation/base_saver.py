@@ -14,21 +14,28 @@
 #  limitations under the License.
 #
 
+import base64
+import json
 import operator
-from functools import reduce
+from functools import partial, reduce
 from typing import Type, Union, Dict
 
+from peewee import Case, Tuple
+
 from fate_flow.db.base_models import DB, BaseModelOperate, DataBaseModel
 from fate_flow.db.db_models import Task, Job
 from fate_flow.db.schedule_models import ScheduleTask, ScheduleTaskStatus, ScheduleJob
 from fate_flow.entity.types import JobStatus, TaskStatus, EndStatus
-from fate_flow.errors.server_error import NoFoundJob, NoFoundTask
+from fate_flow.errors.server_error import NoFoundJob, NoFoundTask, InvalidParameter
+from fate_flow.manager.operation.write_behind import WriteBehind
 from fate_flow.utils.base_utils import current_timestamp
 from fate_flow.utils.log_utils import schedule_logger, sql_logger
 
 
 class BaseSaver(BaseModelOperate):
     STATUS_FIELDS = ["status", "party_status"]
+    # updates of only these fields are coalesced by WriteBehind, status transitions are always written at once
+    WRITE_BEHIND_FIELDS = {"progress", "elapsed"}
     OPERATION = {
             '==': operator.eq,
             '<': operator.lt,
@@ -117,49 +124,132 @@ class BaseSaver(BaseModelOperate):
         return update_status
 
     @classmethod
-    @DB.connection_context()
+    def _write_behind(cls, entity_model, entity_info, write_behind=True):
+        # returns True if the update is left to WriteBehind
+        if not WriteBehind.enabled:
+            return False
+        key = WriteBehind.key(entity_model, entity_info)
+        if key is None:
+            # the update may match any row of the model, so all of its pending updates are written first
+            WriteBehind.flush(entity_model=entity_model)
+            return False
+        if write_behind and cls._can_write_behind(entity_model, entity_info):
+            WriteBehind.put(key, partial(cls._do_update_entity_table, entity_model), dict(entity_info))
+            return True
+        # the pending updates of the row are written first, a later flush must not overwrite this update
+        WriteBehind.flush(keys=[key])
+        return False
+
+    @classmethod
+    def _can_write_behind(cls, entity_model, entity_info):
+        primary_keys = {p_k[2:] for p_k in entity_model.get_primary_keys_name()} | {"job_id"}
+        fields = {k for k in entity_info if k not in primary_keys and hasattr(entity_model, f"f_{k}")}
+        return bool(fields) and fields <= cls.WRITE_BEHIND_FIELDS
+
+    @classmethod
     def _update_status(cls, entity_model, entity_info: dict):
-        query_filters = []
-        primary_keys = entity_model.get_primary_keys_name()
-        for p_k in primary_keys:
-            query_filters.append(operator.attrgetter(p_k)(entity_model) == entity_info[p_k[2:]])
+        cls._write_behind(entity_model, entity_info, write_behind=False)
+        return cls._update_status_now(entity_model, entity_info)
 
-        objs = entity_model.select().where(*query_filters)
-        if not objs:
-            raise Exception(f"can not found the {entity_model.__name__} record to update")
-        obj = objs[0]
+    @classmethod
+    @DB.connection_context()
+    def _update_status_now(cls, entity_model, entity_info: dict):
+        return cls._do_update_status(entity_model, entity_info)
 
+    @classmethod
+    def _do_update_status(cls, entity_model, entity_info: dict):
+        # one conditional update: a status is only set on a row in one of the states allowed to transit to it,
+        # the affected rows tell whether the transition took effect
+        query_filters = cls._primary_key_filters(entity_model, entity_info)
         update_filters = query_filters.copy()
-        update_info = {"job_id": entity_info["job_id"]}
-
+        transitions = {}
+        end_transitions = []
         for status_field in cls.STATUS_FIELDS:
             if entity_info.get(status_field) and hasattr(entity_model, f"f_{status_field}"):
-                if status_field in ["status", "party_status"]:
-                    # update end time
-                    if hasattr(obj, "f_start_time") and obj.f_start_time:
-                        if cls.end_status_contains(entity_info.get(status_field)):
-                            update_info["end_time"] = current_timestamp()
-                            update_info['elapsed'] = update_info['end_time'] - obj.f_start_time
-                    update_info[status_field] = entity_info[status_field]
-                    old_status = getattr(obj, f"f_{status_field}")
-                    new_status = update_info[status_field]
-                    if_pass = False
-                    if isinstance(obj, Task) or isinstance(obj, ScheduleTask) or isinstance(obj, ScheduleTaskStatus):
-                        if cls.check_task_status(old_status, new_status):
-                            if_pass = True
-                    elif isinstance(obj, Job) or isinstance(obj, ScheduleJob):
-                        if cls.check_job_status(old_status, new_status):
-                            if_pass = True
-                        if cls.end_status_contains(new_status) and new_status not in {JobStatus.SUCCESS, JobStatus.CANCELED}:
-                            if isinstance(obj, ScheduleJob):
-                                update_filters.append(ScheduleJob.f_rerun_signal==False)
-                    if if_pass:
-                        update_filters.append(operator.attrgetter(f"f_{status_field}")(type(obj)) == old_status)
-                    else:
-                        # not allow update status
-                        update_info.pop(status_field)
-
-        return cls.execute_update(old_obj=obj, model=entity_model, update_info=update_info, update_filters=update_filters)
+                new_status = entity_info[status_field]
+                if issubclass(entity_model, (Task, ScheduleTask, ScheduleTaskStatus)):
+                    sources = cls.task_status_sources(new_status)
+                elif issubclass(entity_model, (Job, ScheduleJob)):
+                    sources = cls.job_status_sources(new_status)
+                    if cls.end_status_contains(new_status) and new_status not in {JobStatus.SUCCESS, JobStatus.CANCELED}:
+                        if issubclass(entity_model, ScheduleJob):
+                            update_filters.append(ScheduleJob.f_rerun_signal == False)
+                else:
+                    sources = []
+                if not sources:
+                    # not allow update status
+                    continue
+                field = operator.attrgetter(f"f_{status_field}")(entity_model)
+                transitions[field] = (field.in_(sources), new_status)
+                if cls.end_status_contains(new_status):
+                    end_transitions.append(field.in_(sources))
+        if not transitions:
+            cls._check_exists(entity_model, query_filters)
+            return False
+
+        update_fields = {}
+        if len(transitions) == 1:
+            (field, (transition, new_status)), = transitions.items()
+            update_fields[field] = new_status
+            update_filters.append(transition)
+        else:
+            # each status field is only set if its own transition is allowed
+            for field, (transition, new_status) in transitions.items():
+                update_fields[field] = Case(None, [(transition, new_status)], field)
+            update_filters.append(reduce(operator.or_, [transition for transition, _ in transitions.values()]))
+        if end_transitions and hasattr(entity_model, "f_start_time"):
+            # only written along with an end status that is actually set
+            update_fields.update(cls._end_time_fields(entity_model, reduce(operator.or_, end_transitions)))
+
+        operate = entity_model.update(update_fields).where(*update_filters)
+        sql_logger(job_id=entity_info["job_id"]).info(operate)
+        if operate.execute() > 0:
+            return True
+        return cls._in_end_status(entity_model, query_filters, transitions)
+
+    @classmethod
+    def _in_end_status(cls, entity_model, query_filters, transitions):
+        # a repeated report of the end status the row is already in takes effect without a write
+        row = entity_model.select(*transitions.keys()).where(*query_filters).first()
+        if row is None:
+            raise Exception(f"can not found the {entity_model.__name__} record to update")
+        return all(
+            cls.end_status_contains(new_status) and getattr(row, field.name) == new_status
+            for field, (_, new_status) in transitions.items()
+        )
+
+    @classmethod
+    def _primary_key_filters(cls, entity_model, entity_info):
+        return [
+            operator.attrgetter(p_k)(entity_model) == entity_info[p_k[2:]]
+            for p_k in entity_model.get_primary_keys_name()
+        ]
+
+    @classmethod
+    def _check_exists(cls, entity_model, query_filters):
+        # only asked when nothing was updated
+        if not entity_model.select().where(*query_filters).exists():
+            raise Exception(f"can not found the {entity_model.__name__} record to update")
+
+    @classmethod
+    def _end_time_fields(cls, entity_model, end_transition=None):
+        # computed by the database from the start time of the row, only where the end transition applies if given
+        now = current_timestamp()
+        started = entity_model.f_start_time > 0
+        if end_transition is not None:
+            started = started & end_transition
+        return {
+            entity_model.f_end_time: Case(None, [(started, now)], entity_model.f_end_time),
+            entity_model.f_elapsed: Case(None, [(started, now - entity_model.f_start_time)], entity_model.f_elapsed),
+        }
+
+    @classmethod
+    def task_status_sources(cls, dest_status):
+        return TaskStatus.StateTransitionRule.sources(dest_status)
+
+    @classmethod
+    def job_status_sources(cls, dest_status):
+        return JobStatus.StateTransitionRule.sources(dest_status)
 
     @classmethod
     def check_task_status(cls, old_status, dest_status):
@@ -174,8 +264,18 @@ class BaseSaver(BaseModelOperate):
         return EndStatus.contains(status)
 
     @classmethod
-    @DB.connection_context()
     def update_entity_table(cls, entity_model, entity_info, filters: list = None):
+        if cls._write_behind(entity_model, entity_info, write_behind=not filters):
+            return True
+        return cls._update_entity_table_now(entity_model, entity_info, filters)
+
+    @classmethod
+    @DB.connection_context()
+    def _update_entity_table_now(cls, entity_model, entity_info, filters: list = None):
+        return cls._do_update_entity_table(entity_model, entity_info, filters)
+
+    @classmethod
+    def _do_update_entity_table(cls, entity_model, entity_info, filters: list = None):
         query_filters = []
         primary_keys = entity_model.get_primary_keys_name()
         if not filters:
@@ -185,45 +285,33 @@ class BaseSaver(BaseModelOperate):
             for _k in filters:
                 p_k = f"f_{_k}"
                 query_filters.append(operator.attrgetter(p_k)(entity_model) == entity_info[_k])
-        objs = entity_model.select().where(*query_filters)
-        if objs:
-            obj = objs[0]
-        else:
-            if entity_model.__name__ == Job.__name__:
-                raise NoFoundJob()
-            if entity_model.__name__ == Job.__name__:
-                raise NoFoundTask()
-            raise Exception("can not found the {}".format(entity_model.__name__))
         update_filters = query_filters[:]
         update_info = {}
         update_info.update(entity_info)
         for _ in cls.STATUS_FIELDS:
             # not allow update status fields by this function
             update_info.pop(_, None)
-        if update_info.get("tag") in {"job_end", "submit_failed"} and hasattr(entity_model, "f_tag"):
-            if obj.f_start_time:
-                update_info["end_time"] = current_timestamp()
-                update_info['elapsed'] = update_info['end_time'] - obj.f_start_time
-        if update_info.get("progress") and hasattr(entity_model, "f_progress") and update_info["progress"] > 0:
-            update_filters.append(operator.attrgetter("f_progress")(entity_model) <= update_info["progress"])
-        return cls.execute_update(old_obj=obj, model=entity_model, update_info=update_info, update_filters=update_filters)
-
-    @classmethod
-    def execute_update(cls, old_obj, model, update_info, update_filters):
         update_fields = {}
         for k, v in update_info.items():
             attr_name = 'f_%s' % k
-            if hasattr(model, attr_name) and attr_name not in model.get_primary_keys_name():
-                update_fields[operator.attrgetter(attr_name)(model)] = v
+            if hasattr(entity_model, attr_name) and attr_name not in primary_keys:
+                update_fields[operator.attrgetter(attr_name)(entity_model)] = v
+        if update_info.get("tag") in {"job_end", "submit_failed"} and hasattr(entity_model, "f_tag"):
+            update_fields.update(cls._end_time_fields(entity_model))
+        if update_info.get("progress") and hasattr(entity_model, "f_progress") and update_info["progress"] > 0:
+            update_filters.append(operator.attrgetter("f_progress")(entity_model) <= update_info["progress"])
         if update_fields:
-            if update_filters:
-                operate = old_obj.update(update_fields).where(*update_filters)
-            else:
-                operate = old_obj.update(update_fields)
+            operate = entity_model.update(update_fields).where(*update_filters)
             sql_logger(job_id=update_info.get("job_id", "fate_flow")).info(operate)
-            return operate.execute() > 0
-        else:
-            return False
+            if operate.execute() > 0:
+                return True
+        if not entity_model.select().where(*query_filters).exists():
+            if entity_model.__name__ == Job.__name__:
+                raise NoFoundJob()
+            if entity_model.__name__ == Task.__name__:
+                raise NoFoundTask()
+            raise Exception("can not found the {}".format(entity_model.__name__))
+        return False
 
     @classmethod
     @DB.connection_context()
@@ -269,26 +357,63 @@ class BaseSaver(BaseModelOperate):
     @classmethod
     @DB.connection_context()
     def _list(cls, model: Type[DataBaseModel], limit: int = 0, offset: int = 0,
-              query: dict = None, order_by: Union[str, list, tuple] = None):
+              query: dict = None, order_by: Union[str, list, tuple] = None, cursor: str = None,
+              with_count: bool = True, filters: list = None):
+        """
+        rows are ordered by the order field and then the primary key, so that a page can be located by the keys of
+        the last row of the previous page (the cursor) instead of skipping over `offset` rows.
+        a row with a NULL order field has no place in the keyset, so nullable order fields only page by offset
+        :return: rows, total count (None if not with_count) and the cursor of the next page (None on the last page)
+        """
         data = model.select()
+        expressions = list(filters or [])
         if query:
-            data = data.where(cls.query_dict2expression(model, query))
-        count = data.count()
+            expressions.append(cls.query_dict2expression(model, query))
+        if expressions:
+            data = data.where(reduce(operator.iand, expressions))
+        count = data.count() if with_count else None
 
         if not order_by:
             order_by = 'create_time'
         if not isinstance(order_by, (list, tuple)):
             order_by = (order_by, 'asc')
         order_by, order = order_by
-        order_by = getattr(model, f'f_{order_by}')
-        order_by = getattr(order_by, order)()
-        data = data.order_by(order_by)
-
+        keys = [f'f_{order_by}'] + [p_k for p_k in model.get_primary_keys_name() if p_k != f'f_{order_by}']
+        key_fields = [getattr(model, key) for key in keys]
+        data = data.order_by(*[getattr(field, order)() for field in key_fields])
+        # the create time is set on every insert even though the column is nullable
+        keyset_capable = not key_fields[0].null or keys[0] == 'f_create_time'
+
+        if cursor:
+            if not keyset_capable:
+                raise InvalidParameter(order_by=order_by)
+            values = cls.decode_cursor(cursor, len(keys))
+            keyset = Tuple(*key_fields) < Tuple(*values) if order == 'desc' else Tuple(*key_fields) > Tuple(*values)
+            data = data.where(keyset)
+        elif offset > 0:
+            data = data.offset(offset)
         if limit > 0:
             data = data.limit(limit)
-        if offset > 0:
-            data = data.offset(offset)
-        return list(data), count
+        rows = list(data)
+
+        next_cursor = None
+        if keyset_capable and limit > 0 and len(rows) == limit:
+            next_cursor = cls.encode_cursor([getattr(rows[-1], key) for key in keys])
+        return rows, count, next_cursor
+
+    @staticmethod
+    def encode_cursor(values: list):
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str, size: int):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except Exception:
+            raise InvalidParameter(cursor=cursor)
+        if not isinstance(values, list) or len(values) != size:
+            raise InvalidParameter(cursor=cursor)
+        return values
 
     @classmethod
     def query_dict2expression(cls, model: Type[DataBaseModel], query: Dict[str, Union[bool, int, str, list, tuple]]):
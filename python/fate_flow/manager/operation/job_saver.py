@@ -14,9 +14,11 @@
 #  limitations under the License.
 #
 
+from peewee import fn, JOIN
+
 from fate_flow.db.base_models import DB
-from fate_flow.db.db_models import Job, Task
-from fate_flow.entity.types import PROTOCOL
+from fate_flow.db.db_models import Job, Task, JobPartner
+from fate_flow.entity.types import PROTOCOL, JobStatus, FederatedCommunicationType
 from fate_flow.errors.server_error import NoFoundTask
 from fate_flow.manager.operation.base_saver import BaseSaver
 from fate_flow.db.schedule_models import ScheduleJob, ScheduleTask, ScheduleTaskStatus
@@ -25,7 +27,39 @@ from fate_flow.db.schedule_models import ScheduleJob, ScheduleTask, ScheduleTask
 class JobSaver(BaseSaver):
     @classmethod
     def create_job(cls, job_info) -> Job:
-        return cls._create_job(Job, job_info)
+        job = cls._create_job(Job, job_info)
+        cls.create_job_partners(job_info["job_id"], job_info.get("parties", []))
+        return job
+
+    @classmethod
+    @DB.connection_context()
+    def create_job_partners(cls, job_id, parties):
+        party_ids = {str(party_id) for party in parties for party_id in party.get("party_id", [])}
+        if not party_ids:
+            # an empty party id marks the job as filled, no partner filter matches it
+            party_ids = {""}
+        JobPartner.insert_many(
+            [{"f_job_id": job_id, "f_party_id": party_id} for party_id in sorted(party_ids)]
+        ).on_conflict_ignore().execute()
+
+    @classmethod
+    @DB.connection_context()
+    def fill_job_partners(cls, batch_size=1000):
+        # jobs created before the partner table existed
+        last_job_id, count = "", 0
+        while True:
+            jobs = list(
+                Job.select(Job.f_job_id, Job.f_parties)
+                .join(JobPartner, JOIN.LEFT_OUTER, on=(Job.f_job_id == JobPartner.f_job_id))
+                .where((Job.f_job_id > last_job_id) & JobPartner.f_job_id.is_null())
+                .order_by(Job.f_job_id).limit(batch_size)
+            )
+            if not jobs:
+                return count
+            for job in jobs:
+                cls.create_job_partners(job.f_job_id, job.f_parties or [])
+            last_job_id = jobs[-1].f_job_id
+            count += len(jobs)
 
     @classmethod
     def create_task(cls, task_info) -> Task:
@@ -33,6 +67,7 @@ class JobSaver(BaseSaver):
 
     @classmethod
     def delete_job(cls, job_id):
+        cls._delete_job(JobPartner, job_id)
         return cls._delete_job(Job, job_id)
 
     @classmethod
@@ -59,12 +94,19 @@ class JobSaver(BaseSaver):
         }, filters=["job_id"])
 
     @classmethod
-    def list_job(cls, limit, offset, query, order_by):
-        return cls._list(Job, limit, offset, query, order_by)
+    def list_job(cls, limit, offset, query, order_by, partner=None, cursor=None, with_count=True):
+        filters = []
+        if partner:
+            # the partners of a job are the parties other than this party
+            filters.append(Job.f_job_id.in_(
+                JobPartner.select(JobPartner.f_job_id).where(JobPartner.f_party_id == str(partner))
+            ))
+            filters.append(Job.f_party_id != str(partner))
+        return cls._list(Job, limit, offset, query, order_by, cursor=cursor, with_count=with_count, filters=filters)
 
     @classmethod
-    def list_task(cls, limit, offset, query, order_by):
-        return cls._list(Task, limit, offset, query, order_by)
+    def list_task(cls, limit, offset, query, order_by, cursor=None, with_count=True):
+        return cls._list(Task, limit, offset, query, order_by, cursor=cursor, with_count=with_count)
 
     @classmethod
     def query_task(
@@ -122,6 +164,13 @@ class ScheduleJobSaver(BaseSaver):
     def query_job(cls, reverse=None, order_by=None, protocol=PROTOCOL.FATE_FLOW, **kwargs):
         return cls._query_job(ScheduleJob, reverse, order_by, protocol=protocol, **kwargs)
 
+    @classmethod
+    @DB.connection_context()
+    def count_job_by_status(cls):
+        jobs = ScheduleJob.select(ScheduleJob.f_status, fn.COUNT(ScheduleJob.f_job_id).alias("count")).group_by(
+            ScheduleJob.f_status)
+        return {job.f_status: job.count for job in jobs}
+
     @classmethod
     def query_task(cls, only_latest=True, reverse=None, order_by=None, scheduler_status=False, **kwargs):
         if not scheduler_status:
@@ -144,6 +193,26 @@ class ScheduleJobSaver(BaseSaver):
     def update_task(cls, task_info, report=False):
         cls._update_task(ScheduleTaskStatus, task_info, report)
 
+    @classmethod
+    @DB.connection_context()
+    def query_silent_job_ids(cls, since):
+        """
+        running jobs that may change without a schedule event on this instance: the jobs with poll tasks, whose
+        partners never call back, and the jobs updated since `since`, whose callbacks may reach another instance
+        """
+        poll_tasks = ScheduleTaskStatus.select(ScheduleTaskStatus.f_job_id).where(
+            (ScheduleTaskStatus.f_job_id == ScheduleJob.f_job_id) &
+            (ScheduleTaskStatus.f_sync_type == FederatedCommunicationType.POLL)
+        )
+        updated_tasks = ScheduleTask.select(ScheduleTask.f_job_id).where(
+            (ScheduleTask.f_job_id == ScheduleJob.f_job_id) & (ScheduleTask.f_update_time >= since)
+        )
+        jobs = ScheduleJob.select(ScheduleJob.f_job_id).where(
+            ((ScheduleJob.f_status == JobStatus.RUNNING) | (ScheduleJob.f_rerun_signal == True)) &
+            (fn.EXISTS(poll_tasks) | fn.EXISTS(updated_tasks) | (ScheduleJob.f_update_time >= since))
+        )
+        return [job.f_job_id for job in jobs]
+
     @classmethod
     @DB.connection_context()
     def get_status_tasks_asc(cls, job_id):
@@ -151,6 +220,18 @@ class ScheduleJobSaver(BaseSaver):
         tasks_group = cls.get_latest_tasks(tasks=tasks, scheduler_status=True)
         return tasks_group
 
+    @classmethod
+    @DB.connection_context()
+    def get_tasks_party_status(cls, job_id):
+        # all party status of all task versions of the job in one query: {(task_id, task_version): [status]}
+        tasks_party_status = {}
+        tasks = ScheduleTask.select(
+            ScheduleTask.f_task_id, ScheduleTask.f_task_version, ScheduleTask.f_status
+        ).where(ScheduleTask.f_job_id == job_id)
+        for task in tasks:
+            tasks_party_status.setdefault((task.f_task_id, task.f_task_version), []).append(task.f_status)
+        return tasks_party_status
+
     @classmethod
     def task_key(cls, task_id, role, party_id):
         return f"{task_id}_{role}_{party_id}"
@@ -0,0 +1,95 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import atexit
+import threading
+from collections import OrderedDict
+
+from fate_flow.db.base_models import DB
+from fate_flow.runtime.system_settings import WRITE_BEHIND_MAX_PENDING
+from fate_flow.utils.cron import Cron
+from fate_flow.utils.log_utils import schedule_logger
+
+
+class WriteBehind(object):
+    """
+    Coalesces the frequent updates of a job or task row by primary key and writes them in one transaction per flush.
+    Only enabled in the server process where the flusher runs, elsewhere the savers write synchronously.
+    """
+    # reentrant, the SIGTERM handler flushes on the main thread which may already hold it
+    _lock = threading.RLock()
+    _pending = OrderedDict()
+    enabled = False
+
+    @classmethod
+    def enable(cls):
+        cls.enabled = True
+        atexit.register(cls.flush)
+
+    @classmethod
+    def key(cls, entity_model, entity_info):
+        primary_keys = entity_model.get_primary_keys_name()
+        if not all(p_k[2:] in entity_info for p_k in primary_keys):
+            return None
+        return (entity_model.__name__, ) + tuple(entity_info[p_k[2:]] for p_k in primary_keys)
+
+    @classmethod
+    def put(cls, key, apply, entity_info):
+        """
+        :param apply: writes the info without opening a connection, called on flush
+        """
+        with cls._lock:
+            if key in cls._pending:
+                pending_info = cls._pending[key][1]
+                if "progress" in pending_info and "progress" in entity_info:
+                    entity_info["progress"] = max(pending_info["progress"], entity_info["progress"])
+                entity_info = {**pending_info, **entity_info}
+            cls._pending[key] = (apply, entity_info)
+            cls._pending.move_to_end(key)
+            full = len(cls._pending) >= WRITE_BEHIND_MAX_PENDING
+        if full:
+            cls.flush()
+
+    @classmethod
+    def flush(cls, keys=None, entity_model=None):
+        """
+        :param keys: only the pending updates of these rows are written
+        :param entity_model: only the pending updates of this model are written
+        """
+        with cls._lock:
+            if entity_model is not None:
+                keys = [key for key in cls._pending if key[0] == entity_model.__name__]
+            if keys is None:
+                items = list(cls._pending.values())
+                cls._pending.clear()
+            else:
+                items = [cls._pending.pop(key) for key in keys if key in cls._pending]
+        if not items:
+            return 0
+        with DB.connection_context():
+            with DB.atomic():
+                for apply, entity_info in items:
+                    # a savepoint per item, a failed update is rolled back alone
+                    try:
+                        with DB.atomic():
+                            apply(entity_info)
+                    except Exception as e:
+                        schedule_logger(entity_info.get("job_id")).exception(e)
+        return len(items)
+
+
+class WriteBehindFlusher(Cron):
+    def run_do(self):
+        WriteBehind.flush()
@@ -117,12 +117,14 @@ class DataManager:
 
     @staticmethod
     def collect_data(table):
+        # the export doesn't keep the order, so standalone tables are read partition-parallel
+        kwargs = {"ordered": False} if table.engine == StorageEngine.STANDALONE else {}
         if table.data_type == DataType.DATAFRAME:
-            for _, data in table.collect():
+            for _, data in table.collect(**kwargs):
                 for v in data:
                     yield v
         elif table.data_type == DataType.TABLE:
-            for _k, _v in table.collect():
+            for _k, _v in table.collect(**kwargs):
                 yield table.meta.get_id_delimiter().join([_k, _v])
         else:
             return []
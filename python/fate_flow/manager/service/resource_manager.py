@@ -224,6 +224,25 @@ class ResourceManager(object):
         cores, memory = job_utils.get_job_resource_info(job_id, role, party_id)
         return int(cores), memory
 
+    @classmethod
+    @DB.connection_context()
+    def query_local_job_resource(cls, job_id):
+        # the resource the job will apply on all parties of this site
+        cores, memory = 0, 0
+        for job in Job.select(Job.f_cores, Job.f_memory).where(Job.f_job_id == job_id):
+            cores += int(job.f_cores or 0)
+            memory += job.f_memory or 0
+        return cores, memory
+
+    @classmethod
+    @DB.connection_context()
+    def query_engine_resource(cls):
+        engine_name = ENGINES.get(EngineType.COMPUTING)
+        engines = EngineRegistry.query(engine_type=EngineType.COMPUTING, engine_name=engine_name)
+        if not engines:
+            return None
+        return engines[0]
+
     @classmethod
     def query_task_resource(cls, task_info: dict = None):
         cores_per_task = 0
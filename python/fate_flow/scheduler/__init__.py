@@ -15,7 +15,11 @@
 from fate_flow.scheduler.scheduler import SchedulerABC
 from fate_flow.runtime.runtime_config import RuntimeConfig
 from fate_flow.runtime.system_settings import HOST, HTTP_PORT, PROXY_PROTOCOL, API_VERSION, HTTP_REQUEST_TIMEOUT
+from fate_flow.manager.operation.job_saver import ScheduleJobSaver
+from fate_flow.scheduler.event import ScheduleEvent
 from fate_flow.utils.api_utils import get_federated_proxy_address, generate_headers
+from fate_flow.utils.metrics import Metrics
+from fate_flow.utils.schedule_utils import JobSharding
 from ofx.api.client import FlowSchedulerApi
 
 
@@ -38,3 +42,10 @@ def init_scheduler():
             callback=generate_headers)
     )
 
+    # metrics
+    Metrics.register_collector(
+        "fate_flow_schedule_jobs",
+        lambda: [({"status": status}, count) for status, count in ScheduleJobSaver.count_job_by_status().items()]
+    )
+    Metrics.register_collector("fate_flow_schedule_event_queue_depth", ScheduleEvent.size)
+    Metrics.register_collector("fate_flow_schedule_job_leases", lambda: len(JobSharding.held()))
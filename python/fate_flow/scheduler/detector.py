@@ -30,14 +30,19 @@ from fate_flow.utils.base_utils import current_timestamp
 from fate_flow.utils.cron import Cron
 from fate_flow.utils.job_utils import check_task_is_timeout
 from fate_flow.utils.log_utils import detect_logger
+from fate_flow.utils.metrics import Metrics
 
 
 class Detector(Cron):
     def run_do(self):
-        self.detect_running_task()
-        self.detect_end_task()
-        self.detect_resource_record()
-        self.detect_expired_session()
+        with Metrics.timer("detect_running_task"):
+            self.detect_running_task()
+        with Metrics.timer("detect_end_task"):
+            self.detect_end_task()
+        with Metrics.timer("detect_resource_record"):
+            self.detect_resource_record()
+        with Metrics.timer("detect_expired_session"):
+            self.detect_expired_session()
 
     @classmethod
     def detect_running_task(cls):
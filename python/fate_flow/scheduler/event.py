@@ -0,0 +1,105 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import threading
+from collections import OrderedDict
+
+from fate_flow.utils.base_utils import current_timestamp
+from fate_flow.utils.cron import Cron
+
+
+class ScheduleEvent(object):
+    """
+    In-process work queue of job ids whose state has changed.
+    Duplicated job ids are merged until the scheduler takes them.
+    """
+    _condition = threading.Condition()
+    _pending = OrderedDict()
+
+    @classmethod
+    def put(cls, job_id):
+        if not job_id:
+            return
+        with cls._condition:
+            cls._pending[job_id] = True
+            cls._condition.notify()
+
+    @classmethod
+    def take(cls, timeout=None):
+        with cls._condition:
+            if not cls._pending:
+                cls._condition.wait(timeout)
+            job_ids = list(cls._pending.keys())
+            cls._pending.clear()
+            return job_ids
+
+    @classmethod
+    def size(cls):
+        with cls._condition:
+            return len(cls._pending)
+
+
+class ScheduleEventLoop(threading.Thread):
+    def __init__(self, handler, lock=None, logger=None, timeout=1):
+        """
+
+        :param handler: called with the list of changed job ids
+        :param lock: shared with the sweep cron so that the two never schedule at the same time
+        :param logger:
+        :param timeout: wait timeout by second
+        """
+        super(ScheduleEventLoop, self).__init__(daemon=True)
+        self.handler = handler
+        self.lock = lock
+        self.logger = logger
+        self.timeout = timeout
+        self.finished = threading.Event()
+
+    def cancel(self):
+        self.finished.set()
+
+    def run(self):
+        if self.logger:
+            self.logger.info("schedule event loop start.")
+        while not self.finished.is_set():
+            job_ids = ScheduleEvent.take(timeout=self.timeout)
+            if not job_ids:
+                continue
+            try:
+                if self.lock:
+                    with self.lock:
+                        self.handler(job_ids)
+                else:
+                    self.handler(job_ids)
+            except Exception as e:
+                if self.logger:
+                    self.logger.exception(e)
+
+
+class ScheduleTicker(Cron):
+    def __init__(self, handler, **kwargs):
+        """
+
+        :param handler: called with the timestamp after which updated jobs are scheduled again
+        """
+        super(ScheduleTicker, self).__init__(**kwargs)
+        self.handler = handler
+        self.last_tick = current_timestamp()
+
+    def run_do(self):
+        now = current_timestamp()
+        # one more interval covers the updates committed while the previous tick ran
+        since, self.last_tick = self.last_tick - self.interval, now
+        self.handler(since)
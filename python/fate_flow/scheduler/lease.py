@@ -0,0 +1,32 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+from fate_flow.entity.types import EndStatus
+from fate_flow.manager.operation.job_saver import ScheduleJobSaver
+from fate_flow.utils.cron import Cron
+from fate_flow.utils.schedule_utils import JobSharding, clean_expired_leases
+
+
+class LeaseRenewer(Cron):
+    def run_do(self):
+        JobSharding.refresh()
+        job_ids = JobSharding.held()
+        if job_ids:
+            # jobs stopped outside the scheduler, e.g. by a client stop request
+            for job in ScheduleJobSaver.query_job(job_id=job_ids):
+                if EndStatus.contains(job.f_status) and not job.f_rerun_signal:
+                    JobSharding.release(job.f_job_id)
+        JobSharding.renew()
+        clean_expired_leases()
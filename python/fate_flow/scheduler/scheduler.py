@@ -25,10 +25,15 @@ from fate_flow.entity.types import StatusSet, JobStatus, TaskStatus, EndStatus,
     FederatedCommunicationType, AutoRerunStatus
 from fate_flow.entity.code import ReturnCode
 from fate_flow.errors.server_error import NoFoundJob
-from fate_flow.controller.parser import JobParser
+from fate_flow.controller.parser import JobParser, JobParserCache
 from fate_flow.manager.operation.job_saver import ScheduleJobSaver, JobSaver
+from fate_flow.manager.service.resource_manager import ResourceManager
 from fate_flow.runtime.job_default_config import JobDefaultConfig
+from fate_flow.runtime.system_settings import SCHEDULE_WAITING_JOBS_PER_ROUND
+from fate_flow.utils.metrics import Metrics
+from fate_flow.utils.schedule_utils import JobSharding
 from fate_flow.controller.federated import FederatedScheduler
+from fate_flow.scheduler.event import ScheduleEvent
 from fate_flow.utils import schedule_utils, wraps_utils, job_utils
 from fate_flow.utils.base_utils import json_dumps
 from fate_flow.utils.cron import Cron
@@ -71,29 +76,134 @@ class DAGScheduler(SchedulerABC):
         return JobParser(dag)
 
     def run_do(self):
+        JobSharding.rebalance()
         # waiting
+        with Metrics.timer("schedule_waiting"):
+            self.schedule_waiting()
+
+        # running
+        schedule_logger().info("start schedule running jobs")
+        with Metrics.timer("query_running_jobs"):
+            jobs = JobSharding.filter(
+                ScheduleJobSaver.query_job(status=JobStatus.RUNNING, order_by="create_time", reverse=False))
+        schedule_logger().info(f"have {len(jobs)} running jobs")
+        with Metrics.timer("schedule_running"):
+            self.schedule_running(jobs)
+        schedule_logger().info("schedule running jobs finished")
+
+        # rerun
+        schedule_logger().info("start schedule rerun jobs")
+        with Metrics.timer("query_rerun_jobs"):
+            jobs = JobSharding.filter(
+                ScheduleJobSaver.query_job(rerun_signal=True, order_by="create_time", reverse=False))
+        schedule_logger().info(f"have {len(jobs)} rerun jobs")
+        with Metrics.timer("schedule_rerun"):
+            self.schedule_rerun(jobs)
+        schedule_logger().info("schedule rerun jobs finished")
+
+    def schedule_jobs(self, job_ids):
+        """
+        description：
+            Event driven scheduling, only the jobs that changed are scheduled
+        :param job_ids: changed job ids taken from the schedule event queue
+        """
+        schedule_logger().info(f"start schedule {len(job_ids)} changed jobs")
+        JobSharding.rebalance()
+        # changes of jobs owned by other instances are picked up by their sweep
+        with Metrics.timer("query_changed_jobs"):
+            jobs = JobSharding.filter(
+                ScheduleJobSaver.query_job(job_id=job_ids, order_by="create_time", reverse=False))
+        running_jobs = [job for job in jobs if job.f_status == JobStatus.RUNNING and not job.f_rerun_signal]
+        rerun_jobs = [job for job in jobs if job.f_rerun_signal]
+        with Metrics.timer("schedule_running"):
+            self.schedule_running(running_jobs)
+        with Metrics.timer("schedule_rerun"):
+            self.schedule_rerun(rerun_jobs)
+
+        # a new waiting job or a finished job (resource returned) may let the head of the waiting queue start
+        if any(job.f_status == JobStatus.WAITING or EndStatus.contains(job.f_status) for job in jobs):
+            with Metrics.timer("schedule_waiting"):
+                self.schedule_waiting()
+        schedule_logger().info("schedule changed jobs finished")
+
+    def schedule_silent_jobs(self, since):
+        """
+        description：
+            Runs every schedule interval next to the event loop, for the jobs that emit no event on this instance
+        :param since: jobs updated after it are scheduled again
+        """
+        with Metrics.timer("query_silent_jobs"):
+            job_ids = ScheduleJobSaver.query_silent_job_ids(since=since)
+        if job_ids:
+            self.schedule_jobs(job_ids)
+        # resources may be returned by jobs scheduled on other instances
+        with Metrics.timer("schedule_waiting"):
+            self.schedule_waiting()
+
+    def schedule_waiting(self):
         schedule_logger().info("start schedule waiting jobs")
         # order by create_time and priority
-        jobs = ScheduleJobSaver.query_job(
+        jobs = JobSharding.filter(ScheduleJobSaver.query_job(
             status=JobStatus.WAITING,
             order_by=["priority", "create_time"],
             reverse=[True, False]
-        )
+        ))
         schedule_logger().info(f"have {len(jobs)} waiting jobs")
-        if len(jobs):
-            job = jobs[0]
+        admitted_jobs = self.admit_waiting_jobs(jobs)
+        schedule_logger().info(f"admit {len(admitted_jobs)} waiting jobs: {[job.f_job_id for job in admitted_jobs]}")
+        locked_jobs = []
+        for job in admitted_jobs:
+            if JobSharding.acquire(job.f_job_id):
+                locked_jobs.append(job)
+            else:
+                schedule_logger(job.f_job_id).warn(f"get job {job.f_job_id} schedule lock failed, "
+                                                   f"job may be handled by another scheduler")
+        resource_responses = self.apply_jobs_resource([job for job in locked_jobs if not job.f_cancel_signal])
+        for job in locked_jobs:
             schedule_logger().info(f"schedule waiting job {job.f_job_id}")
             try:
-                self.schedule_waiting_jobs(job=job, lock=True)
+                self.schedule_waiting_jobs(job=job, resource_response=resource_responses.get(job.f_job_id))
             except Exception as e:
                 schedule_logger(job.f_job_id).exception(e)
                 schedule_logger(job.f_job_id).error("schedule waiting job failed")
         schedule_logger().info("schedule waiting jobs finished")
 
-        # running
-        schedule_logger().info("start schedule running jobs")
-        jobs = ScheduleJobSaver.query_job(status=JobStatus.RUNNING, order_by="create_time", reverse=False)
-        schedule_logger().info(f"have {len(jobs)} running jobs")
+    @classmethod
+    def admit_waiting_jobs(cls, jobs):
+        """
+        description：
+            Walk the waiting queue in priority order and admit as many jobs as the remaining
+            computing resource of this site can hold. Stop at the first job that does not fit,
+            so that a lower priority job never overtakes a higher priority one.
+        """
+        engine = ResourceManager.query_engine_resource()
+        if not engine:
+            return jobs[:1]
+        remaining_cores, remaining_memory = engine.f_remaining_cores, engine.f_remaining_memory
+        admitted_jobs = []
+        for job in jobs[:SCHEDULE_WAITING_JOBS_PER_ROUND]:
+            if job.f_cancel_signal:
+                admitted_jobs.append(job)
+                continue
+            cores, memory = ResourceManager.query_local_job_resource(job_id=job.f_job_id)
+            if cores > engine.f_cores:
+                # let the apply fail, the job will be stopped with resource limit exceeded
+                admitted_jobs.append(job)
+                continue
+            if cores > remaining_cores or memory > remaining_memory:
+                schedule_logger(job.f_job_id).info(
+                    f"job need cores {cores} memory {memory}, remaining cores {remaining_cores} "
+                    f"memory {remaining_memory}, wait for the next round of scheduling")
+                break
+            remaining_cores -= cores
+            remaining_memory -= memory
+            admitted_jobs.append(job)
+        if not admitted_jobs and jobs:
+            # the resource of this site is busy, still try the head job in case other sites have changed
+            admitted_jobs.append(jobs[0])
+        return admitted_jobs
+
+    def schedule_running(self, jobs):
         for job in jobs:
             schedule_logger().info(f"schedule running job {job.f_job_id}")
             try:
@@ -101,12 +211,8 @@ class DAGScheduler(SchedulerABC):
             except Exception as e:
                 schedule_logger(job.f_job_id).exception(e)
                 schedule_logger(job.f_job_id).error("schedule job failed")
-        schedule_logger().info("schedule running jobs finished")
 
-        # rerun
-        schedule_logger().info("start schedule rerun jobs")
-        jobs = ScheduleJobSaver.query_job(rerun_signal=True, order_by="create_time", reverse=False)
-        schedule_logger().info(f"have {len(jobs)} rerun jobs")
+    def schedule_rerun(self, jobs):
         for job in jobs:
             schedule_logger(job.f_job_id).info(f"schedule rerun job {job.f_job_id}")
             try:
@@ -114,21 +220,30 @@ class DAGScheduler(SchedulerABC):
             except Exception as e:
                 schedule_logger(job.f_job_id).exception(e)
                 schedule_logger(job.f_job_id).error("schedule job failed")
-        schedule_logger().info("schedule rerun jobs finished")
 
     @classmethod
-    def apply_job_resource(cls, job):
-        apply_status_code, federated_response = FederatedScheduler.resource_for_job(
-            job_id=job.f_job_id,
-            roles=job.f_parties,
-            operation_type=ResourceOperation.APPLY.value
-        )
+    def apply_job_resource(cls, job, resource_response=None):
+        if resource_response:
+            apply_status_code, federated_response = resource_response
+        else:
+            apply_status_code, federated_response = FederatedScheduler.resource_for_job(
+                job_id=job.f_job_id,
+                roles=job.f_parties,
+                operation_type=ResourceOperation.APPLY.value
+            )
         if apply_status_code == FederatedSchedulingStatusCode.SUCCESS:
             return True
         else:
             cls.rollback_job_resource(job, federated_response)
             return False
 
+    @classmethod
+    def apply_jobs_resource(cls, jobs):
+        if not jobs:
+            return {}
+        # one request per partner for all the jobs
+        return FederatedScheduler.resource_for_jobs(jobs=jobs, operation_type=ResourceOperation.APPLY.value)
+
     @classmethod
     def rollback_job_resource(cls, job, federated_response):
         rollback_party = []
@@ -164,21 +279,23 @@ class DAGScheduler(SchedulerABC):
 
     @classmethod
     @wraps_utils.schedule_lock
-    def schedule_waiting_jobs(cls, job: ScheduleJob):
+    def schedule_waiting_jobs(cls, job: ScheduleJob, resource_response=None):
         if job.f_cancel_signal:
             FederatedScheduler.sync_job_status(job_id=job.f_job_id, roles=job.f_parties,
                                                job_info={"job_id": job.f_job_id, "status": JobStatus.CANCELED})
             ScheduleJobSaver.update_job_status({"job_id": job.f_job_id, "status": JobStatus.CANCELED})
             schedule_logger(job.f_job_id).info("job have cancel signal")
+            JobSharding.release(job.f_job_id)
             return
-        status = cls.apply_job_resource(job)
+        status = cls.apply_job_resource(job, resource_response=resource_response)
         if status:
             cls.start_job(job_id=job.f_job_id, roles=job.f_parties)
 
     @wraps_utils.schedule_lock
     def schedule_running_job(self, job: ScheduleJob, force_sync_status=False):
         schedule_logger(job.f_job_id).info("scheduling running job")
-        task_scheduling_status_code, auto_rerun_tasks, tasks = TaskScheduler.schedule(job=job)
+        with Metrics.timer("schedule_tasks", job_id=job.f_job_id):
+            task_scheduling_status_code, auto_rerun_tasks, tasks = TaskScheduler.schedule(job=job)
         tasks_status = dict([(task.f_task_name, task.f_status) for task in tasks])
         schedule_logger(job_id=job.f_job_id).info(f"task_scheduling_status_code: {task_scheduling_status_code}, "
                                                   f"tasks_status: {tasks_status.values()}")
@@ -294,8 +411,7 @@ class DAGScheduler(SchedulerABC):
                 return ReturnCode.Base.SUCCESS, "success"
             else:
                 tasks_group = ScheduleJobSaver.get_status_tasks_asc(job_id=job.f_job_id)
-                for task in tasks_group.values():
-                    TaskScheduler.collect_task_of_all_party(job, task=task, set_status=stop_status)
+                TaskScheduler.collect_tasks_of_all_party(job, tasks=list(tasks_group.values()), set_status=stop_status)
                 schedule_logger(job_id).info(f"stop job with {stop_status} failed, {response}")
                 return ReturnCode.Job.KILL_FAILED, json_dumps(response)
         else:
@@ -337,12 +453,17 @@ class DAGScheduler(SchedulerABC):
         schedule_logger(job_id).info("job set rerun signal")
         status = schedule_utils.rerun_signal(job_id=job_id, set_or_reset=True)
         schedule_logger(job_id).info(f"job set rerun signal {'successfully' if status else 'failed'}")
+        JobParserCache.invalidate(job_id)
+        ScheduleEvent.put(job_id)
         return True
 
     @classmethod
     def finish(cls, job, end_status):
         schedule_logger(job.f_job_id).info(f"job finished with {end_status}, do something...")
         cls.stop_job(job_id=job.f_job_id, stop_status=end_status)
+        JobParserCache.invalidate(job.f_job_id)
+        JobSharding.release(job.f_job_id)
+        Metrics.forget_job(job.f_job_id)
         # todo: clean job
         schedule_logger(job.f_job_id).info(f"job finished with {end_status}, done")
 
@@ -396,6 +517,7 @@ class DAGScheduler(SchedulerABC):
                 if status_code != FederatedSchedulingStatusCode.SUCCESS:
                     raise Exception(f"set job to waiting status failed: {response}")
                 ScheduleJobSaver.update_job_status({"job_id": job.f_job_id, "status": job.f_status})
+                ScheduleEvent.put(job.f_job_id)
             schedule_logger(job_id).info(f"submit job successfully, job id is {job.f_job_id}")
             result = {
                 "code": ReturnCode.Base.SUCCESS,
@@ -422,29 +544,40 @@ class TaskScheduler(object):
     @classmethod
     def schedule(cls, job):
         schedule_logger(job.f_job_id).info("scheduling job tasks")
-        dag_schema = DAGSchema(**job.f_dag)
-        job_parser = JobParser(DAGSchema(**job.f_dag))
-        tasks_group = ScheduleJobSaver.get_status_tasks_asc(job_id=job.f_job_id)
+        with Metrics.timer("parse", job_id=job.f_job_id):
+            _, job_parser = JobParserCache.get(job.f_job_id, job.f_dag)
+        with Metrics.timer("query_tasks", job_id=job.f_job_id):
+            tasks_group = ScheduleJobSaver.get_status_tasks_asc(job_id=job.f_job_id)
         waiting_tasks = {}
         auto_rerun_tasks = []
         job_interrupt = False
         canceled = job.f_cancel_signal
+        poll_tasks = [task for task in tasks_group.values() if task.f_sync_type == FederatedCommunicationType.POLL]
+        with Metrics.timer("collect_tasks", job_id=job.f_job_id):
+            cls.collect_tasks_of_all_party(job=job, tasks=poll_tasks)
+        updated_tasks = {}
+        with Metrics.timer("query_tasks_status", job_id=job.f_job_id):
+            federated_tasks_status = cls.get_federated_tasks_status(job_id=job.f_job_id, tasks=tasks_group.values())
         for task in tasks_group.values():
-            if task.f_sync_type == FederatedCommunicationType.POLL:
-                cls.collect_task_of_all_party(job=job, task=task)
-            else:
-                pass
-            new_task_status = cls.get_federated_task_status(job_id=task.f_job_id, task_id=task.f_task_id,
-                                                            task_version=task.f_task_version)
-            task_interrupt = False
-            task_status_have_update = False
+            new_task_status = federated_tasks_status[task.f_task_id]
             if new_task_status != task.f_status:
-                task_status_have_update = True
                 schedule_logger(job.f_job_id).info(f"sync task status {task.f_status} to {new_task_status}")
                 task.f_status = new_task_status
-                FederatedScheduler.sync_task_status(task_id=task.f_task_id, command_body={"status": task.f_status})
-                ScheduleJobSaver.update_task_status(task.to_human_model_dict(), scheduler_status=True)
-            if InterruptStatus.contains(new_task_status):
+                updated_tasks[task.f_task_id] = task
+        if updated_tasks:
+            # one request per party for all the updated tasks
+            with Metrics.timer("sync_tasks_status", job_id=job.f_job_id):
+                FederatedScheduler.sync_tasks_status(
+                    job_id=job.f_job_id,
+                    tasks_status={task_id: task.f_status for task_id, task in updated_tasks.items()}
+                )
+            with Metrics.timer("update_tasks_status", job_id=job.f_job_id):
+                for task in updated_tasks.values():
+                    ScheduleJobSaver.update_task_status(task.to_human_model_dict(), scheduler_status=True)
+        for task in tasks_group.values():
+            task_interrupt = False
+            task_status_have_update = task.f_task_id in updated_tasks
+            if InterruptStatus.contains(task.f_status):
                 task_interrupt = True
                 job_interrupt = True
             if task.f_status == TaskStatus.WAITING:
@@ -462,29 +595,26 @@ class TaskScheduler(object):
         scheduling_status_code = SchedulingStatusCode.NO_NEXT
         schedule_logger(job.f_job_id).info(f"canceled status {canceled}, job interrupt status {job_interrupt}")
         if not canceled and not job_interrupt:
-            for task_id, waiting_task in waiting_tasks.items():
-                dependent_tasks = job_parser.infer_dependent_tasks(
-                    dag_schema.dag.tasks[waiting_task.f_task_name].inputs
-                )
-                schedule_logger(job.f_job_id).info(f"task {waiting_task.f_task_name} dependent tasks:{dependent_tasks}")
-                for task_name in dependent_tasks:
-                    dependent_task = tasks_group[task_name]
-                    if dependent_task.f_status != TaskStatus.SUCCESS:
-                        break
-                else:
-                    scheduling_status_code = SchedulingStatusCode.HAVE_NEXT
+            dependency_index = job_parser.dependency_index
+            dependency_index.sync({task.f_task_name: task.f_status for task in tasks_group.values()})
+            for task_name in dependency_index.ready_tasks():
+                waiting_task = waiting_tasks[task_name]
+                schedule_logger(job.f_job_id).info(
+                    f"task {task_name} dependent tasks:{list(dependency_index.upstream[task_name])} all success")
+                scheduling_status_code = SchedulingStatusCode.HAVE_NEXT
+                with Metrics.timer("start_task", job_id=job.f_job_id):
                     status_code = cls.start_task(job=job, task=waiting_task)
-                    if status_code == SchedulingStatusCode.NO_RESOURCE:
-                        schedule_logger(job.f_job_id).info(
-                            f"task {waiting_task.f_task_id} can not apply resource, wait for the next round of scheduling")
-                        break
-                    elif status_code == SchedulingStatusCode.FAILED:
-                        schedule_logger(job.f_job_id).info(f"task status code: {status_code}")
-                        scheduling_status_code = SchedulingStatusCode.FAILED
-                        waiting_task.f_status = StatusSet.FAILED
-                        FederatedScheduler.sync_task_status(task_id=waiting_task.f_task_id, command_body={
-                            "status": waiting_task.f_status})
-                        break
+                if status_code == SchedulingStatusCode.NO_RESOURCE:
+                    schedule_logger(job.f_job_id).info(
+                        f"task {waiting_task.f_task_id} can not apply resource, wait for the next round of scheduling")
+                    break
+                elif status_code == SchedulingStatusCode.FAILED:
+                    schedule_logger(job.f_job_id).info(f"task status code: {status_code}")
+                    scheduling_status_code = SchedulingStatusCode.FAILED
+                    waiting_task.f_status = StatusSet.FAILED
+                    FederatedScheduler.sync_task_status(task_id=waiting_task.f_task_id, command_body={
+                        "status": waiting_task.f_status})
+                    break
         else:
             schedule_logger(job.f_job_id).info("have cancel signal, pass start job tasks")
         schedule_logger(job.f_job_id).info("finish scheduling job tasks")
@@ -545,11 +675,24 @@ class TaskScheduler(object):
 
     @classmethod
     def collect_task_of_all_party(cls, job, task, set_status=None):
-        tasks_on_all_party = ScheduleJobSaver.query_task(task_id=task.f_task_id, task_version=task.f_task_version)
-        # tasks_status_on_all = set([task.f_status for task in tasks_on_all_party])
-        # if not len(tasks_status_on_all) > 1 and TaskStatus.RUNNING not in tasks_status_on_all:
-        #     return
         status, federated_response = FederatedScheduler.collect_task(task_id=task.f_task_id)
+        cls.update_collected_task(job, task, status, federated_response, set_status=set_status)
+
+    @classmethod
+    def collect_tasks_of_all_party(cls, job, tasks, set_status=None):
+        if not tasks:
+            return
+        federated_responses = FederatedScheduler.collect_tasks(job_id=job.f_job_id,
+                                                               task_ids=[task.f_task_id for task in tasks])
+        for task in tasks:
+            if task.f_task_id not in federated_responses:
+                schedule_logger(job.f_job_id).warning(f"collect task {task.f_task_id} {task.f_task_version} no response")
+                continue
+            status, federated_response = federated_responses[task.f_task_id]
+            cls.update_collected_task(job, task, status, federated_response, set_status=set_status)
+
+    @classmethod
+    def update_collected_task(cls, job, task, status, federated_response, set_status=None):
         if status != FederatedSchedulingStatusCode.SUCCESS:
             schedule_logger(job.f_job_id).warning(f"collect task {task.f_task_id} {task.f_task_version} failed")
         for _role in federated_response.keys():
@@ -582,6 +725,22 @@ class TaskScheduler(object):
                                                                                       tasks_party_status))
         return status
 
+    @classmethod
+    def get_federated_tasks_status(cls, job_id, tasks):
+        tasks_party_status = ScheduleJobSaver.get_tasks_party_status(job_id=job_id)
+        tasks_status = {}
+        for task in tasks:
+            party_status = tasks_party_status.get((task.f_task_id, task.f_task_version))
+            if not party_status:
+                schedule_logger(job_id).error(f"task {task.f_task_id} {task.f_task_version} no found")
+                tasks_status[task.f_task_id] = TaskStatus.FAILED
+                continue
+            tasks_status[task.f_task_id] = cls.calculate_multi_party_task_status(party_status)
+            schedule_logger(job_id=job_id).info(
+                "task {} {} status is {}, calculate by task party status list: {}".format(
+                    task.f_task_id, task.f_task_version, tasks_status[task.f_task_id], party_status))
+        return tasks_status
+
     @classmethod
     def calculate_multi_party_task_status(cls, tasks_party_status):
         tmp_status_set = set(tasks_party_status)
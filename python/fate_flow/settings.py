@@ -16,6 +16,18 @@
 # GRPC
 GRPC_SERVER_MAX_WORKERS = None  # default: (os.cpu_count() or 1) * 5
 
+# Scheduler
+SCHEDULE_EVENT_DRIVEN = True  # schedule changed jobs as soon as partners report, instead of polling every interval
+SCHEDULE_INTERVAL = 2000  # ms, when event driven the poll mode, waiting and remotely updated jobs are still scheduled every interval
+SCHEDULE_SWEEP_INTERVAL = 30000  # ms, safety-net full sweep when event driven
+SCHEDULE_WAITING_JOBS_PER_ROUND = 50  # max waiting jobs admitted in one scheduling round
+JOB_PARSER_CACHE_SIZE = 128  # parsed dags kept in memory by the scheduler, 0 to disable
+SCHEDULE_LEASE_TTL = 30000  # ms, a job lease not renewed within ttl can be taken over by another instance
+SCHEDULE_LEASE_RENEW_INTERVAL = 10000  # ms
+SCHEDULE_SHARD_REPLICAS = 64  # virtual nodes of each instance on the job hash ring
+WRITE_BEHIND_INTERVAL = 1000  # ms, coalesced progress and non terminal status updates are flushed, 0 to disable
+WRITE_BEHIND_MAX_PENDING = 1000  # pending rows that trigger a flush before the interval
+
 # Request
 HTTP_REQUEST_TIMEOUT = 10  # s
 REMOTE_REQUEST_TIMEOUT = 30000  # ms
@@ -32,6 +44,13 @@ UPLOAD_DATA_HOME = ""
 SQLITE_FILE_DIR = ""
 SQLITE_FILE_NAME = "fate_flow_sqlite.db"
 
+# Database
+QUERY_PLAN_AUDIT = True  # explain the hot scheduler queries at startup and warn about full table scans
+
+# Storage
+STORAGE_META_CACHE_SIZE = 1024  # table metas kept in memory by each process, 0 to disable
+STORAGE_META_CACHE_TTL = 5000  # ms, a cached meta older than ttl is checked against the db before use
+
 
 # Client Manager
 APP_TOKEN_LENGTH = 16
@@ -43,16 +43,19 @@ class Cron(threading.Thread):
 
     def run(self):
         def do():
+            acquired = False
             try:
-                if not self.lock or self.lock.acquire(0):
-                    self.run_do()
+                if self.lock:
+                    # the lock may be shared with other threads, wait for it rather than skip the run
+                    acquired = self.lock.acquire()
+                self.run_do()
             except Exception as e:
                 if self.logger:
                     self.logger.exception(e)
                 else:
                     raise e
             finally:
-                if self.lock and self.lock.locked():
+                if acquired:
                     self.lock.release()
         try:
             if self.logger and self.title:
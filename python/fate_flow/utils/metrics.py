@@ -0,0 +1,150 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from fate_flow.utils.log_utils import schedule_logger
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# seconds, the per job series not observed for so long are dropped, in case the job ended elsewhere
+JOB_PHASES_TTL = 3600
+
+
+def _format_labels(labels: tuple):
+    if not labels:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in labels) + "}"
+
+
+class Metrics(object):
+    """
+    In-process metrics of the scheduler hot path, exported in the Prometheus text format.
+    Phase latencies are aggregated by phase; the per job series are kept only while the job is scheduled here.
+    """
+    _lock = threading.Lock()
+    _counters = {}
+    _histograms = {}
+    _job_phases = {}
+    _job_observed = {}
+    _collectors = {}
+
+    @classmethod
+    def inc(cls, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with cls._lock:
+            cls._counters[key] = cls._counters.get(key, 0) + value
+
+    @classmethod
+    def observe(cls, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with cls._lock:
+            if key not in cls._histograms:
+                cls._histograms[key] = [[0] * (len(DEFAULT_BUCKETS) + 1), 0.0, 0]
+            histogram = cls._histograms[key]
+            histogram[0][bisect.bisect_left(DEFAULT_BUCKETS, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    @classmethod
+    def observe_job(cls, job_id, phase, value):
+        with cls._lock:
+            summary = cls._job_phases.setdefault(job_id, {}).setdefault(phase, [0.0, 0])
+            summary[0] += value
+            summary[1] += 1
+            cls._job_observed[job_id] = time.monotonic()
+
+    @classmethod
+    def forget_job(cls, job_id):
+        with cls._lock:
+            cls._job_phases.pop(job_id, None)
+            cls._job_observed.pop(job_id, None)
+
+    @classmethod
+    def _expire_jobs(cls):
+        expired_time = time.monotonic() - JOB_PHASES_TTL
+        for job_id in [job_id for job_id, observed in cls._job_observed.items() if observed < expired_time]:
+            cls._job_phases.pop(job_id, None)
+            cls._job_observed.pop(job_id, None)
+
+    @classmethod
+    @contextmanager
+    def timer(cls, phase, job_id=None, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            cls.observe("fate_flow_schedule_phase_seconds", elapsed, phase=phase, **labels)
+            if job_id:
+                cls.observe_job(job_id, phase, elapsed)
+                schedule_logger(job_id).debug(f"phase {phase} {labels if labels else ''} elapsed {elapsed:.4f}s")
+
+    @classmethod
+    def register_collector(cls, name, func, metric_type="gauge"):
+        """
+        :param func: called on every scrape, returns a number or a list of (labels dict, number)
+        """
+        cls._collectors[name] = (func, metric_type)
+
+    @classmethod
+    def render(cls):
+        lines = []
+        with cls._lock:
+            cls._expire_jobs()
+            counters = dict(cls._counters)
+            histograms = {key: (list(value[0]), value[1], value[2]) for key, value in cls._histograms.items()}
+            job_phases = {job_id: dict(phases) for job_id, phases in cls._job_phases.items()}
+
+        typed = set()
+
+        def _type(name, metric_type):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {metric_type}")
+
+        for (name, labels), value in sorted(counters.items()):
+            _type(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), (buckets, _sum, count) in sorted(histograms.items()):
+            _type(name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(DEFAULT_BUCKETS + ("+Inf", ), buckets):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound), ))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_sum}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        name = "fate_flow_schedule_job_phase_seconds"
+        for job_id, phases in sorted(job_phases.items()):
+            _type(name, "summary")
+            for phase, (_sum, count) in sorted(phases.items()):
+                labels = (("job_id", job_id), ("phase", phase))
+                lines.append(f"{name}_sum{_format_labels(labels)} {_sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        for name, (func, metric_type) in sorted(cls._collectors.items()):
+            try:
+                value = func()
+            except Exception as e:
+                schedule_logger().exception(e)
+                continue
+            _type(name, metric_type)
+            if isinstance(value, (list, tuple)):
+                for labels, _value in value:
+                    lines.append(f"{name}{_format_labels(tuple(sorted(labels.items())))} {_value}")
+            else:
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
@@ -13,10 +13,19 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 #
+import bisect
+import hashlib
+import threading
+
+import peewee
+
 from fate_flow.db.base_models import DB
-from fate_flow.db.schedule_models import ScheduleJob
+from fate_flow.db.schedule_models import ScheduleJob, ScheduleJobLease
+from fate_flow.runtime.runtime_config import RuntimeConfig
+from fate_flow.runtime.system_settings import SCHEDULE_LEASE_TTL, SCHEDULE_SHARD_REPLICAS, HOST, HTTP_PORT
 from fate_flow.utils.base_utils import current_timestamp
 from fate_flow.utils.log_utils import schedule_logger
+from fate_flow.utils.metrics import Metrics
 
 
 @DB.connection_context()
@@ -60,3 +69,163 @@ def schedule_timeout_signal(job_id, ready_timeout_ttl: int = 10*6000):
         if current_timestamp() - job.f_schedule_time > ready_timeout_ttl:
             schedule_logger(job_id).info("schedule timeout, try to update signal")
             schedule_signal(job_id, set_or_reset=False)
+
+
+@DB.connection_context()
+def acquire_lease(job_id, owner, ttl=SCHEDULE_LEASE_TTL) -> bool:
+    now = current_timestamp()
+    # renew our own lease or take over an expired one
+    update_status = ScheduleJobLease.update({
+        ScheduleJobLease.f_owner: owner,
+        ScheduleJobLease.f_expire_time: now + ttl,
+        ScheduleJobLease.f_update_time: now
+    }).where(
+        ScheduleJobLease.f_job_id == job_id,
+        (ScheduleJobLease.f_owner == owner) | (ScheduleJobLease.f_expire_time < now)
+    ).execute() > 0
+    if update_status:
+        return True
+    try:
+        ScheduleJobLease.insert({
+            ScheduleJobLease.f_job_id: job_id,
+            ScheduleJobLease.f_owner: owner,
+            ScheduleJobLease.f_expire_time: now + ttl,
+            ScheduleJobLease.f_create_time: now,
+            ScheduleJobLease.f_update_time: now
+        }).execute()
+        return True
+    except peewee.IntegrityError:
+        # held by another instance
+        return False
+
+
+@DB.connection_context()
+def release_leases(job_ids, owner):
+    if not job_ids:
+        return 0
+    return ScheduleJobLease.delete().where(
+        ScheduleJobLease.f_job_id.in_(list(job_ids)), ScheduleJobLease.f_owner == owner
+    ).execute()
+
+
+@DB.connection_context()
+def renew_leases(job_ids, owner, ttl=SCHEDULE_LEASE_TTL):
+    if not job_ids:
+        return []
+    now = current_timestamp()
+    ScheduleJobLease.update({
+        ScheduleJobLease.f_expire_time: now + ttl,
+        ScheduleJobLease.f_update_time: now
+    }).where(ScheduleJobLease.f_job_id.in_(list(job_ids)), ScheduleJobLease.f_owner == owner).execute()
+    # leases that were taken over after expiring are lost
+    return [lease.f_job_id for lease in ScheduleJobLease.select(ScheduleJobLease.f_job_id).where(
+        ScheduleJobLease.f_job_id.in_(list(job_ids)), ScheduleJobLease.f_owner == owner)]
+
+
+@DB.connection_context()
+def clean_expired_leases(ttl=SCHEDULE_LEASE_TTL):
+    # leases of crashed instances whose jobs will not be scheduled again
+    return ScheduleJobLease.delete().where(ScheduleJobLease.f_expire_time < current_timestamp() - ttl).execute()
+
+
+class ConsistentHashRing(object):
+    def __init__(self, nodes, replicas=SCHEDULE_SHARD_REPLICAS):
+        self.nodes = sorted(set(nodes))
+        self._ring = sorted(
+            (self.hash(f"{node}#{i}"), node) for node in self.nodes for i in range(replicas)
+        )
+        self._keys = [key for key, _ in self._ring]
+
+    @staticmethod
+    def hash(key):
+        return int(hashlib.md5(key.encode()).hexdigest()[:16], 16)
+
+    def get_node(self, key):
+        if not self._ring:
+            return None
+        index = bisect.bisect(self._keys, self.hash(key)) % len(self._keys)
+        return self._ring[index][1]
+
+
+class JobSharding(object):
+    """
+    Job ownership across the flow instances registered in RuntimeConfig.SERVICE_DB.
+    Each instance schedules the job ids hashed onto it and holds a renewable lease on every job it schedules,
+    so a job is handed over only after its lease was released or expired.
+    """
+    _ring = ConsistentHashRing([])
+    _leases = set()
+    _lock = threading.Lock()
+
+    @classmethod
+    def owner(cls):
+        return RuntimeConfig.INSTANCE_ID or f"flow-{HOST}-{HTTP_PORT}"
+
+    @classmethod
+    def refresh(cls):
+        try:
+            nodes = set(RuntimeConfig.SERVICE_DB.get_servers().keys()) if RuntimeConfig.SERVICE_DB else set()
+        except Exception as e:
+            schedule_logger().exception(e)
+            return
+        nodes.add(cls.owner())
+        if sorted(nodes) != cls._ring.nodes:
+            schedule_logger().info(f"scheduler instances changed from {cls._ring.nodes} to {sorted(nodes)}, rebalance")
+            cls._ring = ConsistentHashRing(nodes)
+
+    @classmethod
+    def owns(cls, job_id):
+        if not cls._ring.nodes:
+            cls.refresh()
+        return cls._ring.get_node(job_id) == cls.owner()
+
+    @classmethod
+    def filter(cls, jobs):
+        return [job for job in jobs if cls.owns(job.f_job_id)]
+
+    @classmethod
+    def acquire(cls, job_id):
+        if not cls.owns(job_id):
+            return False
+        if acquire_lease(job_id, cls.owner()):
+            with cls._lock:
+                cls._leases.add(job_id)
+            return True
+        return False
+
+    @classmethod
+    def release(cls, job_id):
+        with cls._lock:
+            cls._leases.discard(job_id)
+        release_leases([job_id], cls.owner())
+        Metrics.forget_job(job_id)
+
+    @classmethod
+    def rebalance(cls):
+        # hand over the jobs that hash onto another instance now
+        with cls._lock:
+            moved = [job_id for job_id in cls._leases if not cls.owns(job_id)]
+            cls._leases.difference_update(moved)
+        if moved:
+            schedule_logger().info(f"release leases of jobs moved to other instances: {moved}")
+            release_leases(moved, cls.owner())
+            for job_id in moved:
+                Metrics.forget_job(job_id)
+
+    @classmethod
+    def held(cls):
+        with cls._lock:
+            return list(cls._leases)
+
+    @classmethod
+    def renew(cls):
+        with cls._lock:
+            job_ids = list(cls._leases)
+        held = set(renew_leases(job_ids, cls.owner()))
+        lost = set(job_ids) - held
+        if lost:
+            schedule_logger().warning(f"leases of jobs {lost} expired and were taken over")
+            with cls._lock:
+                cls._leases.difference_update(lost)
+            for job_id in lost:
+                Metrics.forget_job(job_id)
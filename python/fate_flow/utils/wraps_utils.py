@@ -17,6 +17,7 @@ import threading
 from functools import wraps
 
 from fate_flow.entity.code import ReturnCode
+from fate_flow.entity.types import EndStatus
 
 from flask import request as flask_request
 from fate_flow.errors.server_error import NoFoundTask, ResponseException, NoFoundINSTANCE, NoPermission
@@ -26,7 +27,7 @@ from fate_flow.runtime.system_settings import HOST, HTTP_PORT, API_VERSION
 from fate_flow.utils.api_utils import API, federated_coordination_on_http
 from fate_flow.utils.log_utils import schedule_logger
 from fate_flow.utils.requests_utils import request
-from fate_flow.utils.schedule_utils import schedule_signal
+from fate_flow.utils.schedule_utils import JobSharding
 from fate_flow.db.casbin_models import FATE_CASBIN
 
 
@@ -132,7 +133,7 @@ def schedule_lock(func):
             job = kwargs.get("job")
             schedule_logger(job.f_job_id).debug(f"get job {job.f_job_id} schedule lock")
             _result = None
-            if not schedule_signal(job_id=job.f_job_id, set_or_reset=True):
+            if not JobSharding.acquire(job.f_job_id):
                 schedule_logger(job.f_job_id).warn(f"get job {job.f_job_id} schedule lock failed, "
                                                    f"job may be handled by another scheduler")
                 return
@@ -142,8 +143,10 @@ def schedule_lock(func):
                 schedule_logger(job.f_job_id).exception(e)
                 raise e
             finally:
-                schedule_signal(job_id=job.f_job_id, set_or_reset=False)
-                schedule_logger(job.f_job_id).debug(f"release job {job.f_job_id} schedule lock")
+                # the lease is kept across scheduling rounds and renewed until the job ends
+                if EndStatus.contains(job.f_status) and not job.f_rerun_signal:
+                    JobSharding.release(job.f_job_id)
+                    schedule_logger(job.f_job_id).debug(f"release job {job.f_job_id} schedule lock")
             return _result
         else:
             return func(*args, **kwargs)
@@ -24,11 +24,15 @@ class Federated(BaseAPI):
         return self.job_command(job_id=job_id, roles=roles, command="stop")
 
     def sync_job_status(self, job_id, roles, command_body=None):
-        return self.job_command(job_id=job_id, roles=roles, command=f"status/update", command_body=command_body)
+        return self.job_command(job_id=job_id, roles=roles, command=f"status/update", command_body=command_body,
+                                fail_fast=True)
 
     def resource_for_job(self, job_id, roles, operation_type):
         return self.job_command(job_id=job_id, roles=roles, command=f"resource/{operation_type}")
 
+    def resource_for_jobs(self, jobs, operation_type):
+        return self.batch_job_command(jobs=jobs, command=f"resource/{operation_type}")
+
     def start_job(self, job_id, roles, command_body=None):
         return self.job_command(job_id=job_id, roles=roles, command="start", command_body=command_body)
 
@@ -57,7 +61,13 @@ class Federated(BaseAPI):
         return self.task_command(tasks=tasks, command="collect")
 
     def sync_task_status(self, tasks, command_body=None):
-        return self.task_command(tasks=tasks, command=f"status/update", command_body=command_body)
+        return self.task_command(tasks=tasks, command=f"status/update", command_body=command_body, fail_fast=True)
+
+    def collect_tasks(self, tasks):
+        return self.batch_task_command(tasks=tasks, command="collect")
+
+    def sync_tasks_status(self, tasks, task_bodies):
+        return self.batch_task_command(tasks=tasks, command="status/update", task_bodies=task_bodies)
 
     def stop_task(self, tasks, command_body=None):
         return self.task_command(tasks=tasks, command="stop", command_body=command_body)
@@ -13,20 +13,44 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
 
 import json
+import grpc
 import requests
+from requests.adapters import HTTPAdapter
 
 from ...utils.grpc_utils import wrap_proxy_grpc_packet
-from ...utils.grpc_utils import gen_routing_metadata, get_proxy_channel
+from ...utils.grpc_utils import gen_routing_metadata, ProxyChannelCache
 
 FEDERATED_ERROR = 104
+HTTP_POOL_MAXSIZE = 32
+FEDERATED_MAX_WORKERS = 32
+# messages of an unknown route: flask NotFound/MethodNotAllowed in the json body, or the http status of requests
+BATCH_UNSUPPORTED_MARKS = ("404: Not Found", "405: Method Not Allowed", "404 Client Error", "405 Client Error")
+
+
+class FederatedExecutor(object):
+    """
+    Thread pool shared by all federated commands, it bounds the number of concurrent requests of this process
+    """
+    _executor = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def submit(cls, fn, *args, **kwargs):
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(max_workers=FEDERATED_MAX_WORKERS,
+                                                       thread_name_prefix="federated")
+        return cls._executor.submit(fn, *args, **kwargs)
 
 
 class APIClient(requests.Session):
     def __init__(self, host="127.0.0.1", port=9380, protocol="http", api_version=None, timeout=60,
                  remote_protocol="http", remote_host=None, remote_port=None, grpc_channel="default",
-                 provider: str = "FATE", route_table=None):
+                 provider: str = "FATE", route_table=None, pool_maxsize=HTTP_POOL_MAXSIZE):
         super().__init__()
         self.host = host
         self.port = port
@@ -39,6 +63,9 @@ class APIClient(requests.Session):
         self.grpc_channel = grpc_channel
         self.provider = provider
         self.route_table = route_table
+        self.pool_maxsize = pool_maxsize
+        self._remote_sessions = {}
+        self._remote_sessions_lock = threading.Lock()
 
     @property
     def base_url(self):
@@ -143,9 +170,10 @@ class APIClient(requests.Session):
             url = f"{self.remote_protocol}://{host}:{port}{endpoint}"
         else:
             url = f"{self.base_url}{endpoint}"
+        session = self.get_remote_session(host, port)
         for t in range(try_times):
             try:
-                response = requests.request(method=method, url=url, timeout=timeout, json=json_body, headers=headers)
+                response = session.request(method=method, url=url, timeout=timeout, json=json_body, headers=headers)
                 response.raise_for_status()
             except Exception as e:
                 if t >= try_times - 1:
@@ -156,6 +184,18 @@ class APIClient(requests.Session):
                 except:
                     raise Exception(response.text)
 
+    def get_remote_session(self, host=None, port=None):
+        # keep-alive session per destination, the connections are reused by all federated commands
+        address = f"{host}:{port}" if host and port else self.base_url
+        with self._remote_sessions_lock:
+            if address not in self._remote_sessions:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._remote_sessions[address] = session
+            return self._remote_sessions[address]
+
     @staticmethod
     def remote_on_grpc_proxy(job_id, method, host, port, endpoint, src_party_id, dest_party_id, json_body,
                              try_times=3, timeout=10, headers=None, source_host=None, source_port=None, **kwargs):
@@ -169,7 +209,7 @@ class APIClient(requests.Session):
             src_party_id=src_party_id, dest_party_id=dest_party_id,
         )
         for t in range(try_times):
-            channel, stub = get_proxy_channel(host, port)
+            channel, stub = ProxyChannelCache.get(host, port)
 
             try:
                 _return, _call = stub.unaryCall.with_call(
@@ -177,6 +217,9 @@ class APIClient(requests.Session):
                     timeout=timeout or None,
                 )
             except Exception as e:
+                if isinstance(e, grpc.RpcError) and e.code() == grpc.StatusCode.UNAVAILABLE:
+                    # rebuild the channel on the next try
+                    ProxyChannelCache.invalidate(host, port)
                 if t >= try_times - 1:
                     raise e
             else:
@@ -184,8 +227,6 @@ class APIClient(requests.Session):
                     return json.loads(bytes.decode(_return.body.value))
                 except Exception:
                     raise RuntimeError(f"{_return}, {_call}")
-            finally:
-                channel.close()
 
 
 class BaseAPI:
@@ -226,63 +267,202 @@ class BaseAPI:
             return response
         federated_response[dest_role][dest_party_id] = response
 
+    @staticmethod
+    def batch_unsupported(response):
+        # whether the partner has no such batch endpoint, transport errors and timeouts may have taken effect
+        if response.get("code") == 0:
+            return False
+        message = str(response.get("message", ""))
+        return any(mark in message for mark in BATCH_UNSUPPORTED_MARKS)
+
     @staticmethod
     def is_local(party_id):
         return party_id == "0"
 
-    def job_command(self, job_id, roles, command, command_body=None, parallel=False, initiator_party_id=""):
-        federated_response = {}
+    def job_command(self, job_id, roles, command, command_body=None, parallel=True, initiator_party_id="",
+                    timeout=None, fail_fast=False):
         api_type = "partner/job"
-        threads = []
+        commands = []
         if not command_body:
             command_body = {}
         for party in roles:
             dest_role = party.get("role")
             dest_party_ids = party.get("party_id")
-            federated_response[dest_role] = {}
             for dest_party_id in dest_party_ids:
-                endpoint = f"/{api_type}/{command}"
-                command_body["role"] = dest_role
-                command_body["party_id"] = dest_party_id
-                command_body["job_id"] = job_id
-                args = (job_id, "", "", dest_role, dest_party_id, endpoint, command_body, federated_response)
-                kwargs = {"initiator_party_id": initiator_party_id}
-                if parallel:
-                    t = threading.Thread(target=self.federated_command, args=args, kwargs=kwargs)
-                    threads.append(t)
-                    t.start()
-                else:
-                    self.federated_command(*args, initiator_party_id=initiator_party_id)
-        for thread in threads:
-            thread.join()
-        return federated_response
+                body = dict(command_body)
+                body.update({"role": dest_role, "party_id": dest_party_id, "job_id": job_id})
+                commands.append(dict(job_id=job_id, src_role="", src_party_id="", dest_role=dest_role,
+                                     dest_party_id=dest_party_id, endpoint=f"/{api_type}/{command}", body=body,
+                                     initiator_party_id=initiator_party_id))
+        return self.fan_out(commands, parallel=parallel, timeout=timeout, fail_fast=fail_fast)
 
-    def task_command(self, tasks, command, command_body=None, parallel=False):
-        federated_response = {}
-        threads = []
+    def batch_job_command(self, jobs, command, command_body=None):
+        """
+        Send one request per destination party carrying all of its jobs
+        :param jobs: [{"job_id": ..., "roles": [{"role": ..., "party_id": [...]}]}]
+        :return: {job_id: {role: {party_id: response}}}
+        """
+        party_jobs = {}
+        federated_responses = {}
         if not command_body:
             command_body = {}
+        for job in jobs:
+            federated_responses[job["job_id"]] = {}
+            for party in job["roles"]:
+                dest_role = party.get("role")
+                federated_responses[job["job_id"]][dest_role] = {}
+                for dest_party_id in party.get("party_id"):
+                    party_jobs.setdefault(dest_party_id, []).append({
+                        "job_id": job["job_id"],
+                        "role": dest_role,
+                        "party_id": dest_party_id
+                    })
+        futures = {}
+        for dest_party_id, job_list in party_jobs.items():
+            body = {"jobs": job_list}
+            body.update(command_body)
+            futures[dest_party_id] = FederatedExecutor.submit(
+                self.federated_command, job_id="", src_role="", src_party_id="", dest_role="",
+                dest_party_id=dest_party_id, endpoint=f"/partner/job/batch/{command}", body=body,
+                federated_response=None, only_scheduler=True
+            )
+        for dest_party_id, job_list in party_jobs.items():
+            response = futures[dest_party_id].result()
+            if response.get("code") == 0 and isinstance(response.get("data"), list):
+                for job_response in response["data"]:
+                    federated_responses[job_response["job_id"]][job_response["role"]][dest_party_id] = {
+                        "code": job_response["code"],
+                        "message": job_response.get("message")
+                    }
+            elif self.batch_unsupported(response):
+                # an older partner without the batch command, fall back to one request per job
+                for job in job_list:
+                    self.federated_command(job["job_id"], "", "", job["role"], dest_party_id,
+                                           f"/partner/job/{command}", dict(job, **command_body),
+                                           federated_responses[job["job_id"]])
+            else:
+                # the batch may have taken effect on the partner, so it is not sent again
+                if response.get("code") == 0:
+                    response = {"code": FEDERATED_ERROR, "message": f"invalid batch response: {response}"}
+                for job in job_list:
+                    federated_responses[job["job_id"]][job["role"]][dest_party_id] = response
+        return federated_responses
+
+    def batch_task_command(self, tasks, command, command_body=None, task_bodies=None):
+        """
+        Send one request per destination party carrying all of its tasks of a job
+        :param tasks: [{"job_id": ..., "role": ..., "party_id": ..., "task_id": ..., "task_version": ...}]
+        :param command_body: body shared by all tasks
+        :param task_bodies: {task_id: body of the task}
+        :return: {task_id: {role: {party_id: response}}}
+        """
+        party_tasks = {}
+        federated_responses = {}
+        if not command_body:
+            command_body = {}
+        if not task_bodies:
+            task_bodies = {}
         for task in tasks:
-            command_body.update({
+            task_body = dict(command_body)
+            task_body.update(task_bodies.get(task["task_id"], {}))
+            task_body.update({
                 "job_id": task["job_id"],
                 "role": task["role"],
                 "party_id": task["party_id"],
                 "task_id": task["task_id"],
                 "task_version": task["task_version"]
             })
-            dest_role, dest_party_id = task["role"], task["party_id"]
-            federated_response[dest_role] = federated_response.get(dest_role, {})
-            endpoint = f"/partner/task/{command}"
-            args = (task['job_id'], task['role'], task['party_id'], dest_role, dest_party_id, endpoint, command_body,
-                    federated_response)
-            if parallel:
-                t = threading.Thread(target=self.federated_command, args=args)
-                threads.append(t)
-                t.start()
+            federated_responses.setdefault(task["task_id"], {}).setdefault(task["role"], {})
+            party_tasks.setdefault(task["party_id"], []).append(task_body)
+        futures = {}
+        for dest_party_id, task_list in party_tasks.items():
+            futures[dest_party_id] = FederatedExecutor.submit(
+                self.federated_command, job_id=task_list[0]["job_id"], src_role="", src_party_id="", dest_role="",
+                dest_party_id=dest_party_id, endpoint=f"/partner/task/batch/{command}",
+                body={"job_id": task_list[0]["job_id"], "tasks": task_list},
+                federated_response=None, only_scheduler=True
+            )
+        for dest_party_id, task_list in party_tasks.items():
+            response = futures[dest_party_id].result()
+            if response.get("code") == 0 and isinstance(response.get("data"), list):
+                for task_response in response["data"]:
+                    federated_responses[task_response["task_id"]][task_response["role"]][dest_party_id] = {
+                        "code": task_response["code"],
+                        "message": task_response.get("message"),
+                        "data": task_response.get("data")
+                    }
+            elif self.batch_unsupported(response):
+                # an older partner without the batch command, fall back to one request per task
+                for task_body in task_list:
+                    self.federated_command(task_body["job_id"], task_body["role"], dest_party_id, task_body["role"],
+                                           dest_party_id, f"/partner/task/{command}", task_body,
+                                           federated_responses[task_body["task_id"]])
             else:
-                self.federated_command(*args)
-        for thread in threads:
-            thread.join()
+                # the batch may have taken effect on the partner, so it is not sent again
+                if response.get("code") == 0:
+                    response = {"code": FEDERATED_ERROR, "message": f"invalid batch response: {response}"}
+                for task_body in task_list:
+                    federated_responses[task_body["task_id"]][task_body["role"]][dest_party_id] = response
+        return federated_responses
+
+    def task_command(self, tasks, command, command_body=None, parallel=True, timeout=None, fail_fast=False):
+        commands = []
+        if not command_body:
+            command_body = {}
+        for task in tasks:
+            body = dict(command_body)
+            body.update({
+                "job_id": task["job_id"],
+                "role": task["role"],
+                "party_id": task["party_id"],
+                "task_id": task["task_id"],
+                "task_version": task["task_version"]
+            })
+            commands.append(dict(job_id=task["job_id"], src_role=task["role"], src_party_id=task["party_id"],
+                                 dest_role=task["role"], dest_party_id=task["party_id"],
+                                 endpoint=f"/partner/task/{command}", body=body))
+        return self.fan_out(commands, parallel=parallel, timeout=timeout, fail_fast=fail_fast)
+
+    def fan_out(self, commands, parallel=True, timeout=None, fail_fast=False):
+        """
+        Send the commands to the parties and gather the responses to {role: {party_id: response}}
+        :param commands: federated_command kwargs of every destination party
+        :param parallel: run on the shared federated executor
+        :param timeout: deadline in seconds of all commands, the parties without a response are marked as failed
+        :param fail_fast: return as soon as one party fails, the outcome of the command is failed anyway.
+                          The commands already submitted still run to the end.
+        """
+        federated_response = {}
+        for kwargs in commands:
+            federated_response.setdefault(kwargs["dest_role"], {})
+
+        def _command(kwargs):
+            return self.federated_command(federated_response=None, only_scheduler=True, **kwargs)
+
+        if not parallel or len(commands) <= 1:
+            for kwargs in commands:
+                response = _command(kwargs)
+                federated_response[kwargs["dest_role"]][kwargs["dest_party_id"]] = response
+                if fail_fast and response.get("code") != 0:
+                    break
+            futures = {}
+        else:
+            futures = {FederatedExecutor.submit(_command, kwargs): kwargs for kwargs in commands}
+            try:
+                for future in as_completed(futures, timeout=timeout):
+                    kwargs = futures[future]
+                    response = future.result()
+                    federated_response[kwargs["dest_role"]][kwargs["dest_party_id"]] = response
+                    if fail_fast and response.get("code") != 0:
+                        break
+            except FutureTimeoutError:
+                pass
+        for kwargs in commands:
+            if kwargs["dest_party_id"] not in federated_response[kwargs["dest_role"]]:
+                federated_response[kwargs["dest_role"]][kwargs["dest_party_id"]] = {
+                    "code": FEDERATED_ERROR,
+                    "message": "Federated schedule error, no response before the command returned"
+                }
         return federated_response
 
     def scheduler_command(self, command, party_id, command_body=None, method='POST', initiator_party_id=""):
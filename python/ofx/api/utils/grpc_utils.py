@@ -13,6 +13,7 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 import json
+import threading
 
 import grpc
 
@@ -42,6 +43,52 @@ def get_proxy_channel(host, port):
     return channel, stub
 
 
+class ProxyChannelCache(object):
+    """
+    Long-lived grpc channels keyed by host:port.
+    A channel is dropped once it reports SHUTDOWN or a call fails as UNAVAILABLE, and rebuilt on the next call.
+    TRANSIENT_FAILURE is left to the reconnect of grpc itself.
+    """
+    OPTIONS = [
+        ("grpc.keepalive_time_ms", 60 * 1000),
+        ("grpc.keepalive_timeout_ms", 20 * 1000),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.max_send_message_length", -1),
+        ("grpc.max_receive_message_length", -1),
+    ]
+    _channels = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, host, port):
+        address = f"{host}:{port}"
+        with cls._lock:
+            if address not in cls._channels:
+                channel = grpc.insecure_channel(address, options=cls.OPTIONS)
+                channel.subscribe(cls._health_check(address, channel))
+                cls._channels[address] = (channel, proxy_pb2_grpc.DataTransferServiceStub(channel))
+            return cls._channels[address]
+
+    @classmethod
+    def invalidate(cls, host, port):
+        address = f"{host}:{port}"
+        with cls._lock:
+            channel_stub = cls._channels.pop(address, None)
+        if channel_stub:
+            channel_stub[0].close()
+
+    @classmethod
+    def _health_check(cls, address, channel):
+        def _callback(connectivity):
+            if connectivity == grpc.ChannelConnectivity.SHUTDOWN:
+                with cls._lock:
+                    if cls._channels.get(address, (None, ))[0] is not channel:
+                        return
+                    cls._channels.pop(address)
+                channel.close()
+        return _callback
+
+
 def gen_routing_metadata(src_party_id, dest_party_id):
     routing_head = (
         ("service", "fateflow"),